@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+ABOVE = 'Price Above'
+BELOW = 'Price Below'
+MOVE = 'Day Move (%)'
+KINDS = (ABOVE, BELOW, MOVE)
+
+
+class AlertIndex:
+    __slots__ = ('tickers', 'ids', 'thresholds', 'starts')
+
+    def __init__(self, tickers, ids, thresholds, starts):
+        self.tickers = tickers
+        self.ids = ids
+        self.thresholds = thresholds
+        self.starts = starts
+
+    @classmethod
+    def build(cls, alerts):
+        tickers = sorted(alerts['ticker_symbol'].unique()) if len(alerts) else []
+        codes = pd.Categorical(alerts['ticker_symbol'], categories=tickers).codes
+        ids, thresholds, starts = {}, {}, {}
+        for kind in KINDS:
+            mask = (alerts['kind'] == kind).to_numpy()
+            kind_codes = codes[mask]
+            kind_thresholds = alerts['threshold'].to_numpy(dtype=float)[mask]
+            order = np.lexsort((kind_thresholds, kind_codes))
+            ids[kind] = alerts['id'].to_numpy()[mask][order]
+            thresholds[kind] = kind_thresholds[order]
+            starts[kind] = np.searchsorted(kind_codes[order], np.arange(len(tickers) + 1))
+        return cls(tickers, ids, thresholds, starts)
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.ids.values())
+
+    def evaluate(self, prices, previous_close):
+        prices = pd.Series(prices, dtype=float).reindex(self.tickers).to_numpy()
+        previous = pd.Series(previous_close, dtype=float).reindex(self.tickers).to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            moves = np.abs(prices / previous - 1) * 100
+        observed = {ABOVE: prices, BELOW: prices, MOVE: moves}
+
+        triggered, values = [], []
+        for kind in KINDS:
+            ids, thresholds, starts = self.ids[kind], self.thresholds[kind], self.starts[kind]
+            for i in np.flatnonzero(np.isfinite(observed[kind]) & (starts[1:] > starts[:-1])):
+                lo, hi = starts[i], starts[i + 1]
+                if kind == BELOW:
+                    lo += np.searchsorted(thresholds[lo:hi], observed[kind][i], side='left')
+                else:
+                    hi = lo + np.searchsorted(thresholds[lo:hi], observed[kind][i], side='right')
+                triggered.append(ids[lo:hi])
+                values.append(np.full(hi - lo, observed[kind][i]))
+
+        return pd.DataFrame({
+            'alert_id': np.concatenate(triggered) if triggered else np.array([], dtype=int),
+            'observed': np.concatenate(values) if values else np.array([], dtype=float),
+        })
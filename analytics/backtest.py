@@ -0,0 +1,116 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+import numpy as np
+
+from analytics.optimization import optimize_sharpe
+from analytics.panel import annualized_covariance
+
+TRADING_DAYS = 252
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+POOL_TIMEOUT = 120
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def walk_forward_windows(n_obs, train, step):
+    return [(end - train, end, min(end + step, n_obs)) for end in range(train, n_obs, step)]
+
+
+def fit_window(returns, risk_free_rate, max_weight):
+    return optimize_sharpe(returns, annualized_covariance(returns), risk_free_rate, max_weight)
+
+
+def shared_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_pool():
+    if _pool is not None:
+        discard_pool(_pool)
+
+
+def fit_windows(log_returns, windows, risk_free_rate, max_weight, workers=None):
+    slices = [log_returns[start:end] for start, end, _ in windows]
+    if (workers or MAX_WORKERS) > 1 and len(windows) > 1:
+        pool = None
+        try:
+            pool = shared_pool()
+            chunksize = max(1, len(windows) // (MAX_WORKERS * 4))
+            return np.array(list(pool.map(fit_window, slices, repeat(risk_free_rate), repeat(max_weight),
+                                          timeout=POOL_TIMEOUT, chunksize=chunksize)))
+        except (OSError, BrokenProcessPool, NotImplementedError, TimeoutError):
+            if pool is not None:
+                discard_pool(pool)
+    return np.array([fit_window(r, risk_free_rate, max_weight) for r in slices])
+
+
+def hold_weights(log_returns, windows, weights):
+    equity, turnover = [], []
+    value, drifted = 1.0, None
+    for (_, start, end), w in zip(windows, weights):
+        turnover.append(0.5 * np.abs(w - drifted).sum() if drifted is not None else 0.0)
+        growth = np.exp(np.cumsum(log_returns[start:end], axis=0))
+        period = growth @ w
+        equity.append(value * period)
+        value *= period[-1]
+        drifted = w * growth[-1] / period[-1]
+    return np.concatenate(equity), np.array(turnover)
+
+
+def backtest_stats(equity, turnover, risk_free_rate):
+    daily = equity / np.concatenate(([1.0], equity[:-1])) - 1
+    years = len(equity) / TRADING_DAYS
+    annual_return = equity[-1] ** (1 / years) - 1
+    volatility = daily.std() * np.sqrt(TRADING_DAYS)
+    rebalances = turnover[1:]
+    return {
+        'total_return': float(equity[-1] - 1),
+        'annual_return': float(annual_return),
+        'volatility': float(volatility),
+        'sharpe_ratio': float((annual_return - risk_free_rate) / volatility) if volatility else float('nan'),
+        'max_drawdown': float((equity / np.maximum.accumulate(equity) - 1).min()),
+        'avg_turnover': float(rebalances.mean()) if len(rebalances) else 0.0,
+        'annual_turnover': float(rebalances.sum() / years),
+    }
+
+
+def walk_forward(log_returns, risk_free_rate, max_weight, train=TRADING_DAYS, step=21, workers=None):
+    log_returns = np.ascontiguousarray(log_returns, dtype=np.float64)
+    windows = walk_forward_windows(len(log_returns), train, step)
+    if not windows:
+        raise ValueError(f'Need more than {train} days of returns for a walk-forward backtest.')
+
+    weights = fit_windows(log_returns, windows, risk_free_rate, max_weight, workers)
+    equity, turnover = hold_weights(log_returns, windows, weights)
+    n_assets = log_returns.shape[1]
+    equal_equity, equal_turnover = hold_weights(log_returns, windows, np.full((len(windows), n_assets), 1 / n_assets))
+    return {
+        'windows': windows,
+        'weights': weights,
+        'equity': equity,
+        'equal_weight_equity': equal_equity,
+        'turnover': turnover,
+        'stats': backtest_stats(equity, turnover, risk_free_rate),
+        'equal_weight_stats': backtest_stats(equal_equity, equal_turnover, risk_free_rate),
+    }
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+CHART_POINTS = 600
+
+
+def lttb_indices(x, y, threshold):
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def time_axis(index):
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(float)
+    return np.asarray(index, dtype=float)
+
+
+def downsample_series(series, max_points=CHART_POINTS):
+    series = series.dropna()
+    return series.iloc[lttb_indices(time_axis(series.index), series.to_numpy(), max_points)]
+
+
+def downsample_frame(df, x, columns, max_points=CHART_POINTS):
+    if len(df) <= max_points:
+        return df
+    x_values = time_axis(pd.DatetimeIndex(df[x])) if np.issubdtype(df[x].dtype, np.datetime64) else df[x].to_numpy()
+    per_column = max(3, max_points // len(columns))
+    keep = np.unique(np.concatenate([
+        lttb_indices(x_values, df[c].ffill().bfill().to_numpy(), per_column) for c in columns
+    ]))
+    return df.iloc[keep]
@@ -0,0 +1,59 @@
+import numpy as np
+
+RISKMETRICS_DECAY = 0.94
+SEED_OBSERVATIONS = 20
+
+
+class EwmaCovariance:
+    __slots__ = ('tickers', 'decay', 'cov', 'last_date', 'last_prices', 'observations')
+
+    def __init__(self, tickers, decay=RISKMETRICS_DECAY):
+        self.tickers = list(tickers)
+        self.decay = decay
+        self.cov = np.zeros((len(self.tickers), len(self.tickers)))
+        self.last_date = None
+        self.last_prices = None
+        self.observations = 0
+
+    @classmethod
+    def from_prices(cls, prices, decay=RISKMETRICS_DECAY):
+        state = cls(prices.columns, decay)
+        values = prices.to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.nan_to_num(np.log(values[1:] / values[:-1]), nan=0.0, posinf=0.0, neginf=0.0)
+        seed = returns[:SEED_OBSERVATIONS]
+        if len(seed):
+            state.cov = seed.T @ seed / len(seed)
+            state.observations = len(seed)
+        for r in returns[SEED_OBSERVATIONS:]:
+            state.update(r)
+        state.last_date = prices.index[-1]
+        state.last_prices = prices.ffill().iloc[-1].to_numpy(dtype=float)
+        return state
+
+    def copy(self):
+        state = EwmaCovariance(self.tickers, self.decay)
+        state.cov = self.cov.copy()
+        state.last_date = self.last_date
+        state.last_prices = None if self.last_prices is None else self.last_prices.copy()
+        state.observations = self.observations
+        return state
+
+    def update(self, returns):
+        self.cov *= self.decay
+        self.cov += (1 - self.decay) * np.outer(returns, returns)
+        self.observations += 1
+
+    def update_prices(self, prices):
+        prices = prices.reindex(columns=self.tickers)
+        new = prices[prices.index > self.last_date]
+        for date, row in zip(new.index, new.to_numpy(dtype=float)):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = np.log(row / self.last_prices)
+            self.update(np.where(np.isfinite(returns), returns, 0.0))
+            self.last_prices = np.where(np.isfinite(row), row, self.last_prices)
+            self.last_date = date
+        return len(new)
+
+    def volatility(self, weights, days=1):
+        return float(np.sqrt(weights @ self.cov @ weights * days))
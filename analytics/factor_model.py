@@ -0,0 +1,79 @@
+import numpy as np
+
+DEFAULT_FACTORS = 10
+TRADING_DAYS = 252
+POWER_ITERATIONS = 4
+OVERSAMPLE = 10
+MIN_SPECIFIC_VARIANCE = 1e-10
+
+
+def truncated_svd(matrix, k, seed=0):
+    rng = np.random.default_rng(seed)
+    basis = matrix @ rng.standard_normal((matrix.shape[1], min(k + OVERSAMPLE, matrix.shape[1])))
+    for _ in range(POWER_ITERATIONS):
+        basis, _ = np.linalg.qr(basis)
+        basis, _ = np.linalg.qr(matrix.T @ basis)
+        basis = matrix @ basis
+    basis, _ = np.linalg.qr(basis)
+    u, s, vt = np.linalg.svd(basis.T @ matrix, full_matrices=False)
+    return (basis @ u)[:, :k], s[:k], vt[:k]
+
+
+class FactorModel:
+    __slots__ = ('tickers', 'loadings', 'factor_variance', 'specific_variance', 'last_date', 'last_prices')
+    __array_ufunc__ = None
+
+    def __init__(self, tickers, loadings, factor_variance, specific_variance, last_date=None, last_prices=None):
+        self.tickers = list(tickers)
+        self.loadings = loadings
+        self.factor_variance = factor_variance
+        self.specific_variance = specific_variance
+        self.last_date = last_date
+        self.last_prices = last_prices
+
+    @classmethod
+    def fit(cls, log_returns, tickers, k=None, periods=TRADING_DAYS, **kwargs):
+        returns = np.asarray(log_returns, dtype=np.float64)
+        n_obs, n_assets = returns.shape
+        if n_obs < 2:
+            raise ValueError(f'Factor model needs at least 2 return observations, got {n_obs}')
+        k = min(k or DEFAULT_FACTORS, max(1, n_assets // 2), n_obs - 1)
+        centered = returns - returns.mean(axis=0)
+        _, s, vt = truncated_svd(centered, k)
+        factor_variance = s ** 2 / (n_obs - 1) * periods
+        total_variance = (centered ** 2).sum(axis=0) / (n_obs - 1) * periods
+        specific = total_variance - (vt.T ** 2) @ factor_variance
+        return cls(tickers, vt.T, factor_variance, np.maximum(specific, MIN_SPECIFIC_VARIANCE), **kwargs)
+
+    @property
+    def n_factors(self):
+        return len(self.factor_variance)
+
+    def select(self, tickers):
+        position = {t: i for i, t in enumerate(self.tickers)}
+        rows = [position[t] for t in tickers]
+        last_prices = self.last_prices[rows] if self.last_prices is not None else None
+        return FactorModel(tickers, self.loadings[rows], self.factor_variance, self.specific_variance[rows],
+                           self.last_date, last_prices)
+
+    def __matmul__(self, weights):
+        return self.loadings @ (self.factor_variance * (self.loadings.T @ weights)) + self.specific_variance * weights
+
+    def __rmatmul__(self, weights):
+        return self @ np.asarray(weights)
+
+    def __array__(self, dtype=None, copy=None):
+        cov = (self.loadings * self.factor_variance) @ self.loadings.T
+        cov[np.diag_indices_from(cov)] += self.specific_variance
+        return cov if dtype is None else cov.astype(dtype)
+
+    def portfolio_variance(self, weights):
+        exposures = self.loadings.T @ weights
+        return float(exposures @ (self.factor_variance * exposures) + self.specific_variance @ weights ** 2)
+
+    def volatility(self, weights, days=1):
+        return float(np.sqrt(self.portfolio_variance(weights) * days / TRADING_DAYS))
+
+    def explained_variance(self):
+        total = self.factor_variance.sum() + self.specific_variance.sum()
+        return float(self.factor_variance.sum() / total)
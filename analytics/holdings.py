@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from analytics.valuation import value_holdings
+
+
+class HoldingsSnapshot:
+    __slots__ = ('user_id', 'tickers', 'shares', 'prices', 'previous_close', 'info', 'nightly', 'expires_at',
+                 'signature')
+
+    def __init__(self, user_id, tickers, shares, prices, previous_close, info=None, nightly=None, expires_at=None,
+                 signature=None):
+        self.user_id = user_id
+        self.tickers = list(tickers)
+        self.shares = np.asarray(shares, dtype=float)
+        self.prices = np.asarray(prices, dtype=float)
+        self.previous_close = np.asarray(previous_close, dtype=float)
+        self.info = info or {}
+        self.nightly = nightly
+        self.expires_at = expires_at
+        self.signature = signature
+
+    def __len__(self):
+        return len(self.tickers)
+
+    @property
+    def empty(self):
+        return not self.tickers
+
+    @property
+    def values(self):
+        return self.shares * self.prices
+
+    @property
+    def stock_value(self):
+        return float(np.nansum(self.values))
+
+    def holdings_frame(self):
+        return pd.DataFrame({'ticker_symbol': self.tickers, 'share_count': self.shares})
+
+    def shares_dict(self):
+        return dict(zip(self.tickers, self.shares.tolist()))
+
+    def latest_prices(self):
+        return pd.Series(self.prices, index=self.tickers)
+
+    def position_values(self):
+        return pd.Series(self.values, index=self.tickers)
+
+    def valued(self):
+        return value_holdings(self.holdings_frame(), self.latest_prices(),
+                              dict(zip(self.tickers, self.previous_close.tolist())))
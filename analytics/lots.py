@@ -0,0 +1,99 @@
+from collections import deque
+
+import pandas as pd
+
+METHODS = ('FIFO', 'LIFO', 'Average Cost')
+SHARE_TOLERANCE = 1e-9
+
+
+class LotBook:
+    __slots__ = ('method', 'lots', 'realized', 'last_txn_id', 'last_txn_date')
+
+    def __init__(self, method='FIFO'):
+        if method not in METHODS:
+            raise ValueError(f'Unknown cost basis method {method!r}; expected one of {", ".join(METHODS)}.')
+        self.method = method
+        self.lots = {}
+        self.realized = {}
+        self.last_txn_id = None
+        self.last_txn_date = None
+
+    def can_append(self, txns):
+        return self.last_txn_date is None or all(t['txn_date'] >= self.last_txn_date for t in txns)
+
+    def apply(self, txn):
+        ticker = txn['ticker_symbol']
+        shares, price = float(txn['shares']), float(txn['price_per_share'])
+        lots = self.lots.setdefault(ticker, deque())
+        if txn['txn_type'] == 'Buy':
+            if self.method == 'Average Cost' and lots:
+                held, cost = lots[0][1], lots[0][1] * lots[0][2]
+                lots[0] = [lots[0][0], held + shares, (cost + shares * price) / (held + shares)]
+            else:
+                lots.append([txn['txn_date'], shares, price])
+        else:
+            realized = 0.0
+            while shares > SHARE_TOLERANCE and lots:
+                lot = lots[-1] if self.method == 'LIFO' else lots[0]
+                used = min(shares, lot[1])
+                realized += used * (price - lot[2])
+                lot[1] -= used
+                shares -= used
+                if lot[1] <= SHARE_TOLERANCE:
+                    if self.method == 'LIFO':
+                        lots.pop()
+                    else:
+                        lots.popleft()
+            if shares > SHARE_TOLERANCE:
+                raise ValueError(f"Transaction {txn['id']} sells {shares:g} more shares of {ticker} than the "
+                                 f"ledger holds on {str(txn['txn_date'])[:10]}.")
+            self.realized[ticker] = self.realized.get(ticker, 0.0) + realized
+        self.last_txn_id = max(self.last_txn_id or 0, txn['id'])
+        self.last_txn_date = max(self.last_txn_date or txn['txn_date'], txn['txn_date'])
+
+    def apply_all(self, txns):
+        for txn in sorted(txns, key=lambda t: (t['txn_date'], t['id'])):
+            self.apply(txn)
+        return self
+
+    def positions(self):
+        rows = []
+        for ticker in sorted(set(self.lots) | set(self.realized)):
+            lots = self.lots.get(ticker, ())
+            shares = sum(lot[1] for lot in lots)
+            cost = sum(lot[1] * lot[2] for lot in lots)
+            rows.append({
+                'ticker_symbol': ticker,
+                'lot_shares': shares,
+                'cost_basis': cost,
+                'average_cost': cost / shares if shares > SHARE_TOLERANCE else 0.0,
+                'realized_gain': self.realized.get(ticker, 0.0),
+                'open_lots': len(lots),
+            })
+        return pd.DataFrame(rows, columns=['ticker_symbol', 'lot_shares', 'cost_basis', 'average_cost',
+                                           'realized_gain', 'open_lots'])
+
+    def to_dict(self):
+        return {
+            'method': self.method,
+            'lots': {t: [list(lot) for lot in lots] for t, lots in self.lots.items() if lots},
+            'realized': self.realized,
+            'last_txn_id': self.last_txn_id,
+            'last_txn_date': self.last_txn_date,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        book = cls(data['method'])
+        book.lots = {t: deque(lots) for t, lots in data['lots'].items()}
+        book.realized = dict(data['realized'])
+        book.last_txn_id = data['last_txn_id']
+        book.last_txn_date = data['last_txn_date']
+        return book
+
+
+def unrealized_gains(positions, prices):
+    positions = positions.copy()
+    market_value = positions['lot_shares'] * positions['ticker_symbol'].map(prices).astype(float)
+    positions['unrealized_gain'] = market_value - positions['cost_basis']
+    return positions
@@ -0,0 +1,205 @@
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+
+RIDGE = 1e-6
+
+
+def standard_deviation(weights, cov_matrix):
+    variance = weights.T @ cov_matrix @ weights
+    return np.sqrt(variance)
+
+def expected_return(weights, log_returns):
+    mean_returns = np.asarray(log_returns.mean(axis=0))
+    return np.dot(weights, mean_returns) * 252
+
+def sharpe_ratio(weights, log_returns, cov_matrix, risk_free_rate):
+    return (expected_return(weights, log_returns) - risk_free_rate) / standard_deviation(weights, cov_matrix)
+
+def neg_sharpe_ratio(weights, log_returns, cov_matrix, risk_free_rate):
+    return -sharpe_ratio(weights, log_returns, cov_matrix, risk_free_rate)
+
+
+def neg_sharpe_gradient(weights, mean_returns, cov_matrix, risk_free_rate):
+    cov_weights = cov_matrix @ weights
+    volatility = np.sqrt(weights @ cov_weights)
+    return -mean_returns / volatility + (weights @ mean_returns - risk_free_rate) * cov_weights / volatility ** 3
+
+
+def optimize_sharpe(log_returns, cov_matrix, risk_free_rate, max_weight):
+    n_assets = log_returns.shape[1]
+    mean_returns = np.asarray(log_returns.mean(axis=0)) * 252
+    cov_matrix = cov_matrix.to_numpy() if hasattr(cov_matrix, 'to_numpy') else cov_matrix
+    constraints = {"type": "eq", "fun": lambda w: np.sum(w) - 1}
+    bounds = [(0, max_weight) for _ in range(n_assets)]
+    initial_weights = np.array([1 / n_assets] * n_assets)
+
+    optimize_results = minimize(
+        lambda w: -(w @ mean_returns - risk_free_rate) / np.sqrt(w @ (cov_matrix @ w)),
+        initial_weights,
+        jac=lambda w: neg_sharpe_gradient(w, mean_returns, cov_matrix, risk_free_rate),
+        method="SLSQP",
+        constraints=constraints,
+        bounds=bounds
+    )
+    return optimize_results.x
+
+
+def portfolio_metrics(weights, log_returns, cov_matrix, risk_free_rate):
+    return {
+        "expected_return": float(expected_return(weights, log_returns)),
+        "volatility": float(standard_deviation(weights, cov_matrix)),
+        "sharpe_ratio": float(sharpe_ratio(weights, log_returns, cov_matrix, risk_free_rate)),
+    }
+
+
+def regularized(cov_matrix):
+    cov = np.array(cov_matrix, dtype=float)
+    scale = np.trace(cov) / len(cov) if len(cov) else 0.0
+    cov[np.diag_indices_from(cov)] += RIDGE * (scale if scale > 0 else 1.0)
+    return cov
+
+
+def min_variance(cov_matrix, max_weight, tol=1e-10):
+    cov = regularized(cov_matrix)
+    n = len(cov)
+    upper = max(max_weight, 1 / n)
+    if upper * n <= 1 + tol:
+        return np.full(n, 1 / n)
+
+    def solve_working_set(at_lower, at_upper):
+        free = np.flatnonzero(~(at_lower | at_upper))
+        fixed = np.where(at_upper, upper, 0.0)
+        if not free.size:
+            return free, fixed
+        a, b = cho_solve(cho_factor(cov[np.ix_(free, free)]),
+                         np.column_stack([np.ones(free.size), cov[free] @ fixed])).T
+        fixed[free] = a * (1 - fixed.sum() + b.sum()) / a.sum() - b
+        return free, fixed
+
+    at_lower = np.zeros(n, dtype=bool)
+    at_upper = np.zeros(n, dtype=bool)
+    for _ in range(n):
+        free, weights = solve_working_set(at_lower, at_upper)
+        if free.size and np.all((weights[free] >= 0) & (weights[free] <= upper)):
+            break
+        at_lower[free[weights[free] < 0]] = True
+        at_upper[free[weights[free] > upper]] = True
+        if at_upper.sum() * upper > 1:
+            break
+    else:
+        free = np.array([], dtype=int)
+    if not free.size or np.any((weights[free] < 0) | (weights[free] > upper)):
+        at_lower[:], at_upper[:] = False, False
+        weights = np.full(n, 1 / n)
+
+    for _ in range(10 * n + 10):
+        free, target = solve_working_set(at_lower, at_upper)
+        if not free.size:
+            return weights
+        step = target[free] - weights[free]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            limits = np.where(step < -tol, -weights[free] / step, np.where(step > tol, (upper - weights[free]) / step, np.inf))
+        blocking = int(np.argmin(limits))
+        if limits[blocking] < 1:
+            weights[free] += limits[blocking] * step
+            i = free[blocking]
+            if step[blocking] < 0:
+                weights[i], at_lower[i] = 0.0, True
+            else:
+                weights[i], at_upper[i] = upper, True
+            continue
+
+        weights = target
+        gradient = cov @ weights
+        multiplier = gradient[free].mean()
+        violations = np.concatenate([np.where(at_lower, gradient - multiplier, 0.0),
+                                     np.where(at_upper, multiplier - gradient, 0.0)])
+        worst = int(np.argmin(violations))
+        if violations[worst] >= -tol * np.abs(gradient).max():
+            return weights
+        at_lower[worst % n] = at_upper[worst % n] = False
+    return weights
+
+
+def risk_contributions(weights, cov_matrix):
+    marginal = np.asarray(cov_matrix) @ weights
+    return weights * marginal / (weights @ marginal)
+
+
+def erc_newton(cov, tol=1e-10, max_iter=50):
+    n = len(cov)
+    budget = np.full(n, 1 / n)
+    y = 1 / np.sqrt(np.diag(cov))
+    y /= np.sqrt(y @ cov @ y)
+
+    def objective(y):
+        return 0.5 * y @ cov @ y - budget @ np.log(y)
+
+    for _ in range(max_iter):
+        gradient = cov @ y - budget / y
+        if np.abs(gradient * y).max() < tol:
+            break
+        step = cho_solve(cho_factor(cov + np.diag(budget / y ** 2)), gradient)
+        t, current = 1.0, objective(y)
+        while np.any(y - t * step <= 0) or objective(y - t * step) > current - 0.25 * t * gradient @ step:
+            t *= 0.5
+            if t < 1e-3:
+                return y / y.sum()
+        y = y - t * step
+    return y / y.sum()
+
+
+def capped_risk_budget(cov, budget, upper, w, tol=1e-10, max_iter=100):
+    for _ in range(max_iter):
+        marginal = cov @ w
+        gradient = marginal - budget / w
+        free = ~((w >= upper - 1e-8 * upper) & (gradient < 0))
+        if np.abs(gradient[free] * w[free]).max(initial=0.0) < tol * budget:
+            return w
+        step = np.zeros_like(w)
+        hessian = cov[np.ix_(free, free)] + np.diag(budget / w[free] ** 2)
+        step[free] = cho_solve(cho_factor(hessian), gradient[free])
+        t = 1.0
+        while True:
+            change = np.minimum(w - t * step, upper) - w
+            if np.all(change > -w):
+                # objective change computed directly so it stays accurate when the objective itself is tiny
+                decrease = marginal @ change + 0.5 * change @ cov @ change - budget * np.log1p(change / w).sum()
+                if decrease <= 1e-4 * gradient @ change:
+                    break
+            t *= 0.5
+            if t < 1e-10:
+                return None
+        w = w + change
+    return None
+
+
+def risk_parity(cov_matrix, max_weight, tol=1e-10, max_iter=100):
+    cov = regularized(cov_matrix)
+    n = len(cov)
+    upper = max(max_weight, 1 / n)
+    weights = erc_newton(cov, tol=tol)
+    if (weights <= upper + tol).all():
+        return weights
+
+    cov = cov / np.diag(cov).mean()
+    budget = weights @ cov @ weights / n
+    lower, higher = budget, np.inf
+    w = np.minimum(weights, upper)
+    for _ in range(max_iter):
+        w = capped_risk_budget(cov, budget, upper, w, tol=1e3 * tol)
+        if w is None:
+            break
+        total = w.sum()
+        if abs(total - 1) < 1e3 * tol:
+            return w / total
+        if total < 1:
+            lower = budget
+        else:
+            higher = budget
+        at_cap = w >= upper
+        budget *= ((1 - w[at_cap].sum()) / w[~at_cap].sum()) ** 2 if (~at_cap).any() else 0.0
+        if not lower < budget < higher:
+            budget = (lower + higher) / 2 if np.isfinite(higher) else 2 * lower
+    raise ValueError(f'Risk parity with a {upper:.0%} weight cap did not converge; try a higher maximum weight.')
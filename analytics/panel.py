@@ -0,0 +1,84 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+PANEL_VALUES = 'values.npy'
+PANEL_META = 'meta.json'
+
+
+class PricePanel:
+    __slots__ = ('values', 'dates', 'tickers')
+
+    def __init__(self, values, dates, tickers):
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = np.asarray(tickers, dtype=object)
+
+    @classmethod
+    def from_frame(cls, df, dtype=np.float32):
+        return cls(np.ascontiguousarray(df.to_numpy(dtype=dtype, na_value=np.nan)), df.index, df.columns.tolist())
+
+    def to_frame(self):
+        return pd.DataFrame(self.values, index=self.dates, columns=self.tickers)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def select(self, tickers):
+        positions = pd.Index(self.tickers).get_indexer(tickers)
+        if (positions < 0).any():
+            raise KeyError([t for t, p in zip(tickers, positions) if p < 0])
+        return PricePanel(self.values[:, positions], self.dates, tickers)
+
+    def last_valid(self):
+        valid = np.isfinite(self.values)
+        rows = len(valid) - 1 - np.argmax(valid[::-1], axis=0)
+        return self.values[rows, np.arange(self.values.shape[1])]
+
+    def log_returns(self, out=None):
+        n, k = self.values.shape
+        if out is None:
+            out = np.empty((n - 1, k), dtype=self.values.dtype)
+        np.divide(self.values[1:], self.values[:-1], out=out)
+        np.log(out, out=out)
+        finite = np.isfinite(out).all(axis=1)
+        return out if finite.all() else out[finite]
+
+    def return_dates(self):
+        priced = (np.isfinite(self.values) & (self.values > 0)).all(axis=1)
+        return self.dates[1:][priced[1:] & priced[:-1]]
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, PANEL_VALUES), self.values)
+        with open(os.path.join(directory, PANEL_META), 'w') as f:
+            json.dump({'dates': [d.isoformat() for d in self.dates], 'tickers': self.tickers.tolist()}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        values = np.load(os.path.join(directory, PANEL_VALUES), mmap_mode='r' if mmap else None)
+        with open(os.path.join(directory, PANEL_META)) as f:
+            meta = json.load(f)
+        return cls(values, meta['dates'], meta['tickers'])
+
+
+def portfolio_returns(log_returns, weights, out=None):
+    weights = np.asarray(weights, dtype=log_returns.dtype)
+    return np.matmul(log_returns, weights, out=out).astype(np.float64, copy=False)
+
+
+def rolling_sum(values, window):
+    sums = np.cumsum(values)
+    sums[window:] -= sums[:-window]
+    return sums[window - 1:]
+
+
+def annualized_covariance(log_returns, periods=252):
+    return np.atleast_2d(np.cov(log_returns, rowvar=False)) * periods
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+def portfolio_value_history(prices, shares):
+    if isinstance(prices, pd.Series):
+        prices = prices.to_frame()
+    valid_tickers = [t for t in prices.columns if t in shares and not prices[t].isnull().all()]
+    portfolio_value = prices[valid_tickers].multiply([float(shares[t]) for t in valid_tickers], axis=1).sum(axis=1)
+    portfolio_value = portfolio_value.dropna()
+    return portfolio_value[portfolio_value > 0]
+
+
+def normalized_comparison(portfolio_value, benchmark):
+    portfolio_norm = portfolio_value / portfolio_value.iloc[0] * 100
+    benchmark_norm = benchmark / benchmark.iloc[0] * 100
+    return pd.DataFrame({
+        "Date": portfolio_norm.index,
+        "Portfolio": pd.Series(portfolio_norm.values.ravel(), index=portfolio_norm.index),
+        "S&P 500": pd.Series(benchmark_norm.values.ravel(), index=benchmark_norm.index)
+    })
+
+
+def buy_and_hold_values(prices, weights, start_idx):
+    start_prices = prices[np.minimum(start_idx, len(prices) - 1)]
+    held = weights != 0
+    units = np.where(held, weights / np.where(held, start_prices, 1.0), 0.0)
+    values = units @ np.nan_to_num(prices).T
+    values[(held & ~(start_prices > 0)).any(axis=1) | (start_idx >= len(prices))] = np.nan
+    values[np.arange(len(prices)) < start_idx[:, None]] = np.nan
+    return values
+
+
+def realized_performance(prices, weights, start_dates, benchmark='^GSPC', risk_free_rate=0.0):
+    prices = prices.ffill()
+    price_matrix = prices.to_numpy(dtype=float)
+    start_idx = prices.index.searchsorted(pd.DatetimeIndex(start_dates))
+    weight_matrix = weights.reindex(columns=prices.columns, fill_value=0.0).to_numpy(dtype=float)
+    benchmark_matrix = np.tile((prices.columns == benchmark).astype(float), (len(weight_matrix), 1))
+
+    values = buy_and_hold_values(price_matrix, np.vstack([weight_matrix, benchmark_matrix]),
+                                 np.concatenate([start_idx, start_idx]))
+    daily = values[:, 1:] / values[:, :-1] - 1
+    days = np.isfinite(daily).sum(axis=1)
+    total = np.where(days > 0, values[:, -1] - 1, np.nan)
+    mean = np.full(len(values), np.nan)
+    mean[days > 0] = np.nanmean(daily[days > 0], axis=1)
+    volatility = np.full(len(values), np.nan)
+    volatility[days > 1] = np.nanstd(daily[days > 1], axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+    sharpe = (mean * TRADING_DAYS - risk_free_rate) / volatility
+
+    n = len(weight_matrix)
+    return pd.DataFrame({
+        'days': days[:n],
+        'realized_return': total[:n],
+        'volatility': volatility[:n],
+        'sharpe_ratio': sharpe[:n],
+        'benchmark_return': total[n:],
+        'excess_return': total[:n] - total[n:],
+    }, index=weights.index)
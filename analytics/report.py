@@ -0,0 +1,79 @@
+from datetime import datetime
+from io import BytesIO
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+
+
+def generate_portfolio_pdf(df, port_summary, comparison_df, sector_totals):
+    date = datetime.now().date()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer)
+    story = []
+    styles = getSampleStyleSheet()
+    story.append(Paragraph(f"📊 Portfolio Summary: {date}", styles['Title']))
+    story.append(Spacer(1, 12))
+    if df is not None and not df.empty:
+        df_rounded = df.round(2)
+        data = [df_rounded.columns.to_list()] + df_rounded.values.tolist()
+        table = Table(data, hAlign='LEFT')
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]))
+        story.append(Paragraph("Portfolio Holdings:", styles['Heading2']))
+        story.append(table)
+        story.append(Spacer(0.5, 6))
+
+    if port_summary is not None and not port_summary.empty:
+        data = [port_summary.columns.to_list()] + port_summary.values.tolist()
+        table = Table(data, hAlign='LEFT')
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]))
+        story.append(Paragraph("Portfolio Summary Metrics:", styles['Heading2']))
+        story.append(table)
+        story.append(Spacer(1, 12))
+
+    if comparison_df is not None and not comparison_df.empty:
+        plt.figure()
+        plt.plot(comparison_df['Date'], comparison_df['Portfolio'], label='Portfolio')
+        plt.plot(comparison_df['Date'], comparison_df["S&P 500"], label='S&P 500')
+        plt.xlabel('Date')
+        plt.ylabel('Value')
+        plt.title('Portfolio Performance vs S&P 500')
+        plt.legend()
+        image_buffer = BytesIO()
+        plt.savefig(image_buffer, format='png')
+        plt.close()
+        image_buffer.seek(0)
+        img = Image(image_buffer, width=5 * inch, height=3 * inch)
+        story.append(img)
+
+    if sector_totals is not None and not sector_totals.empty:
+        labels = sector_totals['Sector']
+        sizes = sector_totals['Value']
+        plt.figure()
+        plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
+        plt.axis('equal')
+        plt.title('Portfolio Allocation by Sector')
+        plt.legend()
+        pie_buffer = BytesIO()
+        plt.savefig(pie_buffer, format='png')
+        plt.close()
+        pie_buffer.seek(0)
+        pie = Image(pie_buffer, width=5 * inch, height=3* inch)
+        story.append(pie)
+
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+
+from analytics.panel import portfolio_returns, rolling_sum
+
+
+def log_returns(prices):
+    return np.log(prices / prices.shift(1)).dropna()
+
+
+def position_weights(shares, last_prices, portfolio_value):
+    return np.array([shares[t] * last_prices[t] / portfolio_value for t in shares])
+
+
+def historical_var_from_returns(log_returns, weights, portfolio_value, days, confidence):
+    range_returns_dollar = rolling_sum(portfolio_returns(np.asarray(log_returns), weights), days)
+    np.expm1(range_returns_dollar, out=range_returns_dollar)
+    range_returns_dollar *= portfolio_value
+    VaR = -np.percentile(range_returns_dollar, 100 - confidence)
+    return VaR, range_returns_dollar
+
+
+def historical_var(close_df, weights, portfolio_value, days, confidence):
+    return historical_var_from_returns(log_returns(close_df), weights, portfolio_value, days, confidence)
+
+
+def parametric_var(volatility, portfolio_value, confidence):
+    return portfolio_value * -np.expm1(-ndtri(confidence / 100) * volatility)
+
+
+def horizon_returns(log_returns, days):
+    sums = np.cumsum(log_returns, axis=0, dtype=np.float64)
+    sums[days:] -= sums[:-days]
+    return sums[days - 1:]
+
+
+def var_decomposition(log_returns, weights, tickers, VaR, portfolio_value, days=1):
+    horizon = horizon_returns(np.asarray(log_returns), days)
+    horizon -= horizon.mean(axis=0)
+    portfolio = horizon @ weights
+    betas = horizon.T @ portfolio / (portfolio @ portfolio)
+    return pd.DataFrame({
+        'weight': weights,
+        'beta': betas,
+        'marginal_var': betas * VaR / portfolio_value,
+        'component_var': weights * betas * VaR,
+        'contribution': weights * betas,
+    }, index=pd.Index(tickers, name='ticker'))
+
+
+def correlation_matrix(log_returns, tickers):
+    return pd.DataFrame(np.corrcoef(np.asarray(log_returns), rowvar=False), index=tickers, columns=tickers)
+
+
+def return_histogram(returns, bins=50):
+    counts, edges = np.histogram(np.asarray(returns, dtype=float), bins=bins)
+    return {'counts': counts.tolist(), 'edges': edges.tolist()}
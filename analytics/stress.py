@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+BENCHMARK = '^GSPC'
+HISTORY_START = '2007-01-01'
+MIN_BETA_OBSERVATIONS = 60
+BETA_WINDOW = 756
+
+HISTORICAL_SCENARIOS = {
+    '2008 Financial Crisis': ('2007-10-09', '2009-03-09'),
+    '2011 Debt Ceiling Downgrade': ('2011-07-22', '2011-10-03'),
+    '2015 China Devaluation': ('2015-08-10', '2015-08-25'),
+    '2018 Q4 Selloff': ('2018-09-20', '2018-12-24'),
+    '2020 COVID Crash': ('2020-02-19', '2020-03-23'),
+    '2022 Rate Shock': ('2022-01-03', '2022-10-12'),
+}
+
+
+def parse_overrides(text):
+    overrides = {}
+    for item in filter(None, (part.strip() for part in str(text or '').split(','))):
+        ticker, _, shock = item.partition(':')
+        try:
+            overrides[ticker.strip().upper()] = float(shock.strip().rstrip('%')) / 100
+        except ValueError:
+            raise ValueError(f"Could not read override '{item}'; use TICKER:PERCENT, e.g. AAPL:-30.") from None
+    return overrides
+
+
+def market_betas(prices, benchmark=BENCHMARK):
+    values = prices.iloc[-BETA_WINDOW - 1:].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.log(values[1:] / values[:-1])
+    market = returns[:, prices.columns.get_loc(benchmark)]
+    valid = np.isfinite(returns) & np.isfinite(market)[:, None]
+    count = valid.sum(axis=0)
+    x = np.where(valid, market[:, None], 0.0)
+    y = np.where(valid, returns, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x, mean_y = x.sum(axis=0) / count, y.sum(axis=0) / count
+        betas = ((x * y).sum(axis=0) / count - mean_x * mean_y) / ((x * x).sum(axis=0) / count - mean_x ** 2)
+    return np.where((count >= MIN_BETA_OBSERVATIONS) & np.isfinite(betas), betas, 1.0)
+
+
+def stress_test(prices, position_values, windows=None, shocks=(), benchmark=BENCHMARK):
+    windows = HISTORICAL_SCENARIOS if windows is None else windows
+    tickers = list(position_values.index)
+    prices = prices.reindex(columns=tickers + [benchmark])
+    betas = market_betas(prices, benchmark)[:-1]
+    values = prices.to_numpy(dtype=float)
+    last_valid = np.maximum.accumulate(np.where(np.isfinite(values), np.arange(len(values))[:, None], 0), axis=0)
+
+    names = list(windows) + [name for name, _, _ in shocks]
+    starts = prices.index.searchsorted(pd.DatetimeIndex([start for start, _ in windows.values()]))
+    ends = prices.index.searchsorted(pd.DatetimeIndex([end for _, end in windows.values()]), side='right') - 1
+    in_range = (starts < len(prices)) & (ends >= starts)
+    starts, ends = np.minimum(starts, len(prices) - 1), np.maximum(ends, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns = np.arange(values.shape[1])
+        historical = np.where(in_range[:, None],
+                              values[last_valid[ends], columns] / values[last_valid[starts], columns] - 1, np.nan)
+
+    custom = np.empty((len(shocks), len(tickers) + 1))
+    for i, (_, market_shock, overrides) in enumerate(shocks):
+        custom[i, :-1] = betas * market_shock
+        custom[i, -1] = market_shock
+        for ticker, shock in overrides.items():
+            if ticker in position_values.index:
+                custom[i, tickers.index(ticker)] = shock
+
+    returns = np.vstack([historical, custom])
+    proxied = ~np.isfinite(returns[:, :-1])
+    returns[:, :-1] = np.where(proxied, betas * returns[:, -1:], returns[:, :-1])
+
+    weights = position_values.to_numpy(dtype=float)
+    contributions = returns[:, :-1] * weights
+    pnl = returns[:, :-1] @ weights
+    total = weights.sum()
+    table = pd.DataFrame({
+        'Scenario': names,
+        'Start': [windows[n][0] for n in windows] + ['Custom'] * len(shocks),
+        'End': [windows[n][1] for n in windows] + ['Custom'] * len(shocks),
+        'S&P 500 Return (%)': returns[:, -1] * 100,
+        'Portfolio Return (%)': pnl / total * 100 if total else np.nan,
+        'P&L ($)': pnl,
+        'Proxied Holdings': proxied.sum(axis=1),
+    })
+    return table, pd.DataFrame(contributions, index=names, columns=tickers)
@@ -0,0 +1,62 @@
+from bisect import bisect_left, insort
+
+SYMBOL_COLUMNS = ['ticker', 'name', 'exchange', 'sector', 'valid']
+
+
+class SymbolIndex:
+    __slots__ = ('by_ticker', 'tickers', 'names')
+
+    def __init__(self):
+        self.by_ticker = {}
+        self.tickers = []
+        self.names = []
+
+    @classmethod
+    def from_rows(cls, rows):
+        index = cls()
+        index.by_ticker = {row['ticker'].upper(): row for row in rows}
+        index.tickers = sorted(t for t, row in index.by_ticker.items() if row.get('valid'))
+        index.names = sorted((row['name'].lower(), t) for t, row in index.by_ticker.items()
+                             if row.get('valid') and row.get('name'))
+        return index
+
+    def __len__(self):
+        return len(self.by_ticker)
+
+    def get(self, ticker):
+        return self.by_ticker.get(ticker.upper())
+
+    def is_valid(self, ticker):
+        row = self.get(ticker)
+        return None if row is None else bool(row.get('valid'))
+
+    def add(self, row):
+        ticker = row['ticker'].upper()
+        previous = self.by_ticker.get(ticker)
+        if previous is not None and previous.get('valid'):
+            self.tickers.remove(ticker)
+            if previous.get('name'):
+                self.names.remove((previous['name'].lower(), ticker))
+        self.by_ticker[ticker] = row
+        if row.get('valid'):
+            insort(self.tickers, ticker)
+            if row.get('name'):
+                insort(self.names, (row['name'].lower(), ticker))
+
+    def complete(self, prefix, limit=10):
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+        matches = []
+        upper = prefix.upper()
+        for ticker in self.tickers[bisect_left(self.tickers, upper):]:
+            if not ticker.startswith(upper) or len(matches) >= limit:
+                break
+            matches.append(ticker)
+        lower = prefix.lower()
+        for name, ticker in self.names[bisect_left(self.names, (lower, '')):]:
+            if not name.startswith(lower) or len(matches) >= limit:
+                break
+            if ticker not in matches:
+                matches.append(ticker)
+        return [self.by_ticker[t] for t in matches]
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+COLUMN_ALIASES = {
+    'date': 'txn_date',
+    'trade date': 'txn_date',
+    'txn_date': 'txn_date',
+    'type': 'txn_type',
+    'action': 'txn_type',
+    'side': 'txn_type',
+    'txn_type': 'txn_type',
+    'ticker': 'ticker_symbol',
+    'symbol': 'ticker_symbol',
+    'ticker_symbol': 'ticker_symbol',
+    'shares': 'shares',
+    'quantity': 'shares',
+    'qty': 'shares',
+    'price': 'price_per_share',
+    'price per share': 'price_per_share',
+    'price_per_share': 'price_per_share',
+    'notes': 'notes',
+    'description': 'notes',
+}
+TYPE_ALIASES = {'buy': 'Buy', 'bought': 'Buy', 'b': 'Buy', 'sell': 'Sell', 'sold': 'Sell', 's': 'Sell'}
+REQUIRED_COLUMNS = ['txn_date', 'txn_type', 'ticker_symbol', 'shares']
+SHARE_TOLERANCE = 1e-9
+
+
+def parse_trades(raw):
+    df = raw.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip().lower(), str(c).strip().lower()))
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        return pd.DataFrame(), [f"Missing column(s): {', '.join(missing)}"]
+
+    trades = pd.DataFrame({
+        'row': np.arange(2, len(df) + 2),
+        'txn_date': pd.to_datetime(df['txn_date'], errors='coerce'),
+        'txn_type': df['txn_type'].astype(str).str.strip().str.lower().map(TYPE_ALIASES),
+        'ticker_symbol': df['ticker_symbol'].astype(str).str.strip().str.upper(),
+        'shares': pd.to_numeric(df['shares'], errors='coerce').abs(),
+        'price_per_share': pd.to_numeric(df['price_per_share'], errors='coerce') if 'price_per_share' in df else np.nan,
+        'notes': df['notes'].fillna('N/A').astype(str) if 'notes' in df else 'N/A',
+    })
+
+    checks = {
+        'invalid date': trades['txn_date'].isna(),
+        'type must be Buy or Sell': trades['txn_type'].isna(),
+        'missing ticker': trades['ticker_symbol'].isin(['', 'NAN']),
+        'shares must be a positive number': ~(trades['shares'] > 0),
+        'price must be positive': trades['price_per_share'].notna() & ~(trades['price_per_share'] > 0),
+    }
+    errors = []
+    bad = pd.Series(False, index=trades.index)
+    for message, mask in checks.items():
+        errors.extend(f'Row {r}: {message}' for r in trades.loc[mask, 'row'])
+        bad |= mask
+    return trades[~bad].sort_values(['txn_date', 'row'], kind='stable').reset_index(drop=True), errors
+
+
+def fill_missing_prices(trades, closes):
+    trades = trades.copy()
+    missing = trades['price_per_share'].isna()
+    for ticker, group in trades[missing].groupby('ticker_symbol'):
+        if ticker in closes:
+            series = closes[ticker].dropna()
+            if not series.empty:
+                trades.loc[group.index, 'price_per_share'] = series.asof(group['txn_date'].values).values
+    return trades
+
+
+def signed_shares(trades):
+    return np.where(trades['txn_type'] == 'Sell', -trades['shares'], trades['shares'])
+
+
+def apply_trades(positions, trades):
+    existing = pd.Series(positions, dtype=float)
+    running = trades[['ticker_symbol']].assign(delta=signed_shares(trades))
+    running['position'] = running.groupby('ticker_symbol')['delta'].cumsum() + running['ticker_symbol'].map(existing).fillna(0.0)
+    oversold = running.loc[running['position'] < -SHARE_TOLERANCE, 'ticker_symbol'].unique().tolist()
+
+    net = running.groupby('ticker_symbol')['delta'].sum()
+    final = existing.add(net, fill_value=0.0)
+    final = final[final.index.isin(net.index)]
+    final[final.abs() <= SHARE_TOLERANCE] = 0.0
+    return final, oversold
+
+
+def transaction_rows(user_id, trades):
+    total_value = trades['shares'] * trades['price_per_share']
+    return [
+        {
+            'user_id': user_id,
+            'txn_date': d.isoformat(),
+            'txn_type': t,
+            'ticker_symbol': s,
+            'shares': float(n),
+            'price_per_share': float(p),
+            'total_value': float(v),
+            'notes': note,
+        }
+        for d, t, s, n, p, v, note in zip(trades['txn_date'], trades['txn_type'], trades['ticker_symbol'],
+                                          trades['shares'], trades['price_per_share'], total_value, trades['notes'])
+    ]
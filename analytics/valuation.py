@@ -0,0 +1,39 @@
+import hashlib
+from collections import defaultdict
+
+import pandas as pd
+
+
+def value_holdings(holdings, prices, previous_close):
+    df = holdings.copy()
+    shares = df['share_count'].astype(float)
+    df['current_price'] = df['ticker_symbol'].map(prices).astype(float)
+    df['total_value'] = shares * df['current_price']
+    df['day_change'] = df['current_price'] - df['ticker_symbol'].map(previous_close).astype(float)
+    df['total_change'] = df['day_change'] * shares
+    return df
+
+
+def portfolio_summary(holdings_value, cash):
+    stock_value = float(holdings_value['total_value'].sum()) if not holdings_value.empty else 0.0
+    total_value = float(cash) + stock_value
+    day_change = float(holdings_value['total_change'].sum()) if not holdings_value.empty else 0.0
+    return {
+        'cash': float(cash),
+        'stock_value': stock_value,
+        'total_value': total_value,
+        'day_change': day_change,
+        'day_change_pct': (day_change / total_value) * 100 if total_value > 0 else 0.0,
+    }
+
+
+def sector_allocation(values, sectors):
+    totals = defaultdict(float)
+    for ticker, value in values.items():
+        totals[sectors.get(ticker, 'N/A')] += value
+    return pd.DataFrame(list(totals.items()), columns=['Sector', 'Value'])
+
+
+def holdings_signature(holdings):
+    pairs = sorted((str(t), round(float(s), 6)) for t, s in zip(holdings['ticker_symbol'], holdings['share_count']))
+    return hashlib.sha1(repr(pairs).encode()).hexdigest()
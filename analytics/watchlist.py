@@ -0,0 +1,38 @@
+import pandas as pd
+
+
+def get_price_on_or_before(hist, date):
+    if hist.empty:
+        return None
+    date_str = date.strftime("%Y-%m-%d")
+    if date_str in hist.index:
+        return hist.loc[date_str]["Close"]
+    hist_dates = pd.to_datetime([d.split()[0] for d in hist.index.astype(str)])
+    target_date = pd.to_datetime(date_str)
+    if target_date < hist_dates.min():
+        first_date = hist_dates.min().strftime("%Y-%m-%d")
+        return hist.loc[first_date]["Close"]
+    valid_dates = hist_dates[hist_dates <= target_date]
+    if len(valid_dates) > 0:
+        closest_date = valid_dates.max().strftime("%Y-%m-%d")
+        return hist.loc[closest_date]["Close"]
+    return None
+
+def watchlist_changes(hist, share_price, last_close, one_month_ago, three_months_ago, six_months_ago):
+    price_1m = get_price_on_or_before(hist, one_month_ago)
+    price_3m = get_price_on_or_before(hist, three_months_ago)
+    price_6m = get_price_on_or_before(hist, six_months_ago)
+
+    if any(v is None for v in [price_1m, price_3m, price_6m, share_price, last_close]):
+        return None
+
+    day_change = share_price - last_close
+    month_change = share_price - price_1m
+    threeM_change = share_price - price_3m
+    sixM_change = share_price - price_6m
+    day_pct = (day_change / last_close) * 100 if last_close else None
+    month_pct = (month_change / price_1m) * 100 if price_1m else None
+    threeM_pct = (threeM_change / price_3m) * 100 if price_3m else None
+    sixM_pct = (sixM_change / price_6m) * 100 if price_6m else None
+
+    return [share_price, price_1m, price_3m, price_6m, day_pct, month_pct, threeM_pct, sixM_pct]
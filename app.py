@@ -3,6 +3,10 @@ from supabase import create_client, Client
 from features.portfolio_management import show_port_manager
 from features.stock_research import show_research_watchlist_page
 from features.optimize import portfolio_page
+from services.tracing import trace, render_trace_panel
+from services.profiling import maybe_profile
+from services.market_cache import market_cache
+from services.prewarm import start_prewarmer
 st.set_page_config(
     page_title='Key Investing',
     page_icon="portfolio_icon.png"
@@ -11,6 +15,7 @@ supabase_url = st.secrets["SUPABASE_URL"]
 supabase_key = st.secrets["SUPABASE_KEY"]
 
 supabase: Client = create_client(supabase_url, supabase_key)
+start_prewarmer()
 
 
 
@@ -67,18 +72,21 @@ def main_app():
                                                 'Portfolio Optimization'])
     content = st.empty()
 
-    if page == 'Portfolio Management':
-        with content:
-            show_port_manager()
+    with trace(page) as page_trace, maybe_profile(page):
+        if page == 'Portfolio Management':
+            with content:
+                show_port_manager()
 
-    if page == 'Research and Watchlist':
-        with content:
-            show_research_watchlist_page()
+        if page == 'Research and Watchlist':
+            with content:
+                show_research_watchlist_page()
 
 
-    if page == 'Portfolio Optimization':
-        with content:
-            portfolio_page()
+        if page == 'Portfolio Optimization':
+            with content:
+                portfolio_page()
+
+    render_trace_panel(page_trace, market_cache.stats())
 
     st.divider()
 
@@ -0,0 +1,229 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics.optimization import min_variance, optimize_sharpe, risk_parity
+from analytics.report import generate_portfolio_pdf
+from analytics.risk import historical_var
+from analytics.watchlist import get_price_on_or_before, watchlist_changes
+
+DEFAULT_TICKERS = [5, 50, 500]
+DEFAULT_YEARS = [1, 5, 20]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+SECTORS = ['Technology', 'Healthcare', 'Financial Services', 'Energy', 'Industrials', 'Utilities']
+
+
+def synthetic_prices(n_tickers, years, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=datetime(2025, 1, 2), periods=int(years * 252))
+    drift = rng.normal(0.0003, 0.0002, n_tickers)
+    vol = rng.uniform(0.01, 0.03, n_tickers)
+    log_returns = rng.normal(drift, vol, (len(dates), n_tickers))
+    prices = 100 * np.exp(np.cumsum(log_returns, axis=0))
+    tickers = [f'T{i:03d}' for i in range(n_tickers)]
+    return pd.DataFrame(prices, index=dates, columns=tickers)
+
+
+def yf_history(close):
+    hist = close.to_frame('Close')
+    hist.index = hist.index.tz_localize('America/New_York')
+    return hist
+
+
+def case_optimize(prices):
+    log_returns = np.log(prices / prices.shift(1)).dropna()
+    cov_matrix = log_returns.cov() * 252
+    max_weight = max(0.25, 1 / prices.shape[1])
+
+    def run():
+        optimize_sharpe(log_returns, cov_matrix, 0.04, max_weight)
+    return run
+
+
+def case_min_variance(prices):
+    cov_matrix = np.log(prices / prices.shift(1)).dropna().cov().to_numpy() * 252
+    max_weight = max(0.25, 1 / prices.shape[1])
+
+    def run():
+        min_variance(cov_matrix, max_weight)
+    return run
+
+
+def case_risk_parity(prices):
+    cov_matrix = np.log(prices / prices.shift(1)).dropna().cov().to_numpy() * 252
+    max_weight = max(0.25, 1 / prices.shape[1])
+
+    def run():
+        risk_parity(cov_matrix, max_weight)
+    return run
+
+
+def case_var(prices):
+    shares = np.full(prices.shape[1], 10.0)
+    portfolio_value = float((prices.iloc[-1] * shares).sum())
+    weights = shares * prices.iloc[-1].values / portfolio_value
+
+    def run():
+        historical_var(prices, weights, portfolio_value, 5, 95.0)
+    return run
+
+
+def case_watchlist(prices):
+    histories = [yf_history(prices[t].iloc[-130:]) for t in prices.columns]
+    today = datetime.combine(prices.index[-1], datetime.min.time(), tzinfo=timezone.utc)
+    dates = (today - timedelta(days=30), today - timedelta(days=90), today - timedelta(days=182))
+
+    def run():
+        for hist in histories:
+            close = hist['Close']
+            watchlist_changes(hist, close.iloc[-1], close.iloc[-2], *dates)
+    return run
+
+
+def case_price_lookup(prices):
+    histories = [yf_history(prices[t]) for t in prices.columns]
+    span = prices.index[-1] - prices.index[0]
+    targets = [prices.index[0] + span * frac + timedelta(hours=12) for frac in (0.1, 0.5, 0.9)]
+
+    def run():
+        for hist in histories:
+            for target in targets:
+                get_price_on_or_before(hist, target)
+    return run
+
+
+def case_pdf(prices):
+    rng = np.random.default_rng(1)
+    last = prices.iloc[-1]
+    shares = rng.integers(1, 500, len(last))
+    day_change = (prices.iloc[-1] - prices.iloc[-2]).values
+    df = pd.DataFrame({
+        'Ticker': prices.columns,
+        'Shares': shares.astype(str),
+        'Current Price ($)': last.values,
+        'Total Value ($)': last.values * shares,
+        'Day Change Per Share ($)': day_change,
+        'Total Day Change ($)': day_change * shares,
+    })
+    port_summary = pd.DataFrame({
+        'Metric': ['Cash Assets', 'Total Stock Value', 'Total Portfolio Value'],
+        'Value': ['$0.00', f"${df['Total Value ($)'].sum():,.2f}", f"${df['Total Value ($)'].sum():,.2f}"],
+    })
+    portfolio = (prices * shares).sum(axis=1)
+    comparison_df = pd.DataFrame({
+        'Date': prices.index,
+        'Portfolio': (portfolio / portfolio.iloc[0] * 100).values,
+        'S&P 500': (prices.iloc[:, 0] / prices.iloc[0, 0] * 100).values,
+    })
+    df['Sector'] = [SECTORS[i % len(SECTORS)] for i in range(len(df))]
+    sector_df = df.groupby('Sector', as_index=False)['Total Value ($)'].sum()
+    sector_df.columns = ['Sector', 'Value']
+    df = df.drop(columns=['Sector'])
+
+    def run():
+        generate_portfolio_pdf(df, port_summary, comparison_df, sector_df)
+    return run
+
+
+CASES = {
+    'optimize_sharpe': case_optimize,
+    'min_variance': case_min_variance,
+    'risk_parity': case_risk_parity,
+    'historical_var': case_var,
+    'watchlist_changes': case_watchlist,
+    'get_price_on_or_before': case_price_lookup,
+    'generate_portfolio_pdf': case_pdf,
+}
+
+
+def time_case(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return {
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'max_s': max(timings),
+        'repeat': repeat,
+    }
+
+
+def run_benchmarks(cases, ticker_counts, years_list, repeat):
+    results = {}
+    for years in years_list:
+        for n_tickers in ticker_counts:
+            prices = synthetic_prices(n_tickers, years)
+            for name in cases:
+                key = f'{name}[tickers={n_tickers},years={years}]'
+                results[key] = time_case(CASES[name](prices), repeat)
+                print(f"{key:<55} median {results[key]['median_s'] * 1000:>11.2f} ms")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]['median_s']
+        after = result['median_s']
+        ratio = after / before if before else float('inf')
+        flag = 'REGRESSION' if ratio > 1 + tolerance else ''
+        print(f'{key:<55} {before * 1000:>11.2f} -> {after * 1000:>11.2f} ms  x{ratio:.2f} {flag}')
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the analytics hot paths on synthetic price data.')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--tickers', nargs='+', type=int, default=DEFAULT_TICKERS)
+    parser.add_argument('--years', nargs='+', type=int, default=DEFAULT_YEARS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, type=Path,
+                        help='write results as the new baseline')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, type=Path,
+                        help='compare results against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown before a case is flagged (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.cases, args.tickers, args.years, args.repeat)
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}')
+            exit_code = 1
+
+    if args.save:
+        args.save.write_text(json.dumps({
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'results': results,
+        }, indent=2))
+        print(f'Saved baseline to {args.save}')
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,476 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+UNIVERSE = ['AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOGL', 'META', 'TSLA', 'BRK-B', 'JPM', 'V', 'UNH', 'XOM', 'JNJ', 'PG',
+            'MA', 'HD', 'CVX', 'MRK', 'ABBV', 'PEP', 'KO', 'COST', 'AVGO', 'WMT', 'MCD', 'CSCO', 'ADBE', 'CRM', 'NFLX',
+            'AMD', 'INTC', 'QCOM', 'TXN', 'NKE', 'DIS', 'BA', 'CAT', 'GS', 'IBM', 'ORCL']
+SECTORS = ['Technology', 'Healthcare', 'Financial Services', 'Energy', 'Industrials', 'Consumer Defensive']
+HISTORY_START = '2005-01-03'
+DEFAULTS = {
+    'watchlist_alerts': {'active': True},
+    'triggered_alerts': {'dismissed': False},
+    'symbol_directory': {'valid': True},
+}
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+STEPS = ['login', 'portfolio_time_range', 'optimize_page', 'optimize_run', 'watchlist_page', 'watchlist_refresh']
+
+
+def user_id(i):
+    return f'00000000-0000-4000-8000-{i:012d}'
+
+
+def seed_tables(n_users, seed=0):
+    rng = np.random.default_rng(seed)
+    tables = defaultdict(list)
+    tables['symbol_directory'] = [
+        {'ticker': t, 'name': f'{t} Inc.', 'exchange': 'NASDAQ', 'sector': SECTORS[i % len(SECTORS)], 'valid': True,
+         'updated_at': datetime.now(timezone.utc).isoformat()} for i, t in enumerate(UNIVERSE)]
+    tables['ticker_info'] = [{'ticker': t, 'sector': SECTORS[i % len(SECTORS)]} for i, t in enumerate(UNIVERSE)]
+    txn_id = 0
+    for i in range(n_users):
+        uid = user_id(i)
+        held = rng.choice(UNIVERSE, int(rng.integers(5, 16)), replace=False)
+        tables['user_cash'].append({'user_id': uid, 'cash_amount': float(rng.integers(0, 50000))})
+        for ticker in held:
+            shares = float(rng.integers(1, 200))
+            price = float(rng.uniform(20, 500))
+            txn_id += 1
+            tables['user_portfolio'].append({'user_id': uid, 'ticker_symbol': str(ticker), 'share_count': shares})
+            tables['user_transactions'].append({
+                'id': txn_id, 'user_id': uid, 'ticker_symbol': str(ticker), 'txn_type': 'Buy', 'shares': shares,
+                'price_per_share': price, 'total_value': shares * price, 'notes': 'N/A',
+                'txn_date': (datetime(2024, 1, 2) + timedelta(days=int(rng.integers(0, 500)))).isoformat(),
+            })
+        for ticker in rng.choice(UNIVERSE, 5, replace=False):
+            tables['user_watchlist'].append({'user_id': uid, 'ticker_symbol': str(ticker), 'notes': 'N/A'})
+    return tables
+
+
+def coerce(raw, like):
+    if isinstance(like, bool):
+        return raw == 'true'
+    if isinstance(like, (int, float)):
+        return float(raw)
+    return raw
+
+
+def matches(row, column, expression):
+    op, _, raw = expression.partition('.')
+    value = row.get(column)
+    if op == 'is':
+        return value is None if raw == 'null' else value == (raw == 'true')
+    if op == 'in':
+        return str(value) in {v.strip().strip('"') for v in raw.strip('()').split(',')}
+    if value is None:
+        return False
+    target = coerce(raw, value)
+    return {'eq': value == target, 'neq': value != target, 'gt': value > target, 'gte': value >= target,
+            'lt': value < target, 'lte': value <= target}.get(op, False)
+
+
+class StubDatabase:
+    def __init__(self, tables):
+        self.tables = tables
+        self.next_id = defaultdict(lambda: 1 + max((r.get('id') or 0 for rows in tables.values() for r in rows),
+                                                   default=0))
+        self.lock = threading.Lock()
+
+    def filtered(self, table, params):
+        rows = self.tables[table]
+        for column, expression in params:
+            if column not in RESERVED_PARAMS:
+                rows = [r for r in rows if matches(r, column, expression)]
+        return rows
+
+    def select(self, table, params):
+        with self.lock:
+            rows = self.filtered(table, params)
+            query = dict(params)
+            for term in reversed(query.get('order', '').split(',')):
+                if term:
+                    column, _, direction = term.partition('.')
+                    rows = sorted(rows, key=lambda r: (r.get(column) is None, r.get(column)),
+                                  reverse=direction.startswith('desc'))
+            offset = int(query.get('offset', 0))
+            rows = rows[offset:offset + int(query['limit'])] if 'limit' in query else rows[offset:]
+            columns = [c.strip() for c in query.get('select', '*').split(',')]
+            return [dict(r) if columns == ['*'] else {c: r.get(c) for c in columns} for r in rows]
+
+    def insert(self, table, params, body, upsert=False):
+        rows = body if isinstance(body, list) else [body]
+        conflict = [c.strip() for c in dict(params).get('on_conflict', '').split(',') if c.strip()]
+        written = []
+        with self.lock:
+            for row in rows:
+                existing = next((r for r in self.tables[table] if conflict and all(r.get(c) == row.get(c) for c in conflict)),
+                                None) if upsert else None
+                if existing is not None:
+                    existing.update(row)
+                    written.append(dict(existing))
+                    continue
+                row = {**DEFAULTS.get(table, {}), **row}
+                if 'id' not in row:
+                    row['id'] = self.next_id[table]
+                    self.next_id[table] += 1
+                self.tables[table].append(row)
+                written.append(dict(row))
+        return written
+
+    def update(self, table, params, body):
+        with self.lock:
+            rows = self.filtered(table, params)
+            for row in rows:
+                row.update(body)
+            return [dict(r) for r in rows]
+
+    def delete(self, table, params):
+        with self.lock:
+            removed = self.filtered(table, params)
+            ids = {id(r) for r in removed}
+            self.tables[table] = [r for r in self.tables[table] if id(r) not in ids]
+            return [dict(r) for r in removed]
+
+
+def completion(content):
+    return {
+        'id': 'stub', 'object': 'chat.completion', 'created': int(time.time()), 'model': 'stub',
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+    }
+
+
+def fred_observations():
+    rows = ''.join(f'<observation realtime_start="{d}" realtime_end="{d}" date="{d}" value="4.25"/>'
+                   for d in ('2025-01-01', '2025-02-01', '2025-03-01'))
+    return f'<?xml version="1.0" encoding="utf-8" ?><observations>{rows}</observations>'.encode()
+
+
+def stub_handler(database, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def reply(self, status, payload, content_type='application/json'):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload, default=str).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length)) if length else {}
+
+        def handle_request(self, method):
+            url = urlsplit(self.path)
+            params = parse_qsl(url.query, keep_blank_values=True)
+            if url.path.startswith('/openai/'):
+                time.sleep(latency['llm'])
+                self.body()
+                return self.reply(200, completion('Stub portfolio analysis.'))
+            if url.path.startswith('/fred/'):
+                time.sleep(latency['fred'])
+                return self.reply(200, fred_observations(), 'text/xml')
+            if not url.path.startswith('/rest/v1/'):
+                return self.reply(404, {'message': f'no stub for {url.path}'})
+
+            time.sleep(latency['db'])
+            table = url.path[len('/rest/v1/'):]
+            if table.startswith('rpc/'):
+                self.body()
+                return self.reply(404, {'message': f'no stub for function {table[4:]}', 'code': 'PGRST202'})
+            if method == 'GET':
+                return self.reply(200, database.select(table, params))
+            if method == 'POST':
+                upsert = 'merge-duplicates' in (self.headers.get('Prefer') or '')
+                return self.reply(201, database.insert(table, params, self.body(), upsert))
+            if method == 'PATCH':
+                return self.reply(200, database.update(table, params, self.body()))
+            if method == 'DELETE':
+                return self.reply(200, database.delete(table, params))
+            return self.reply(405, {'message': method})
+
+        def do_GET(self):
+            self.handle_request('GET')
+
+        def do_POST(self):
+            self.handle_request('POST')
+
+        def do_PATCH(self):
+            self.handle_request('PATCH')
+
+        def do_DELETE(self):
+            self.handle_request('DELETE')
+
+    return Handler
+
+
+@lru_cache(maxsize=None)
+def synthetic_closes(ticker):
+    dates = pd.bdate_range(HISTORY_START, date.today())
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    log_returns = rng.normal(0.0003, rng.uniform(0.01, 0.025), len(dates))
+    return pd.Series(rng.uniform(20, 400) * np.exp(np.cumsum(log_returns)), index=dates)
+
+
+def period_start(period, end):
+    if period == 'max':
+        return pd.Timestamp(HISTORY_START)
+    if period.endswith('mo'):
+        return end - timedelta(days=int(period[:-2]) * 31)
+    return end - timedelta(days=int(period[:-1]) * {'y': 366, 'd': 1}.get(period[-1], 1))
+
+
+def stub_bars(ticker, start=None, end=None, period=None, interval='1d'):
+    closes = synthetic_closes(ticker)
+    end = pd.Timestamp(end or date.today() + timedelta(days=1))
+    start = pd.Timestamp(start) if start is not None else period_start(period or '1mo', end)
+    daily = closes[(closes.index >= start) & (closes.index < end)]
+    if not str(interval).endswith(('m', 'h')):
+        return daily
+    minutes = int(interval[:-1]) * (60 if interval.endswith('h') else 1)
+    stamps = [pd.Timestamp(f'{d:%Y-%m-%d} 09:30', tz='America/New_York') + timedelta(minutes=m)
+              for d in daily.index[-5:] for m in range(0, 390, minutes)]
+    drift = np.random.default_rng(len(stamps)).normal(0, 0.0005, len(stamps)).cumsum()
+    return pd.Series(daily.iloc[-1] * np.exp(drift), index=pd.DatetimeIndex(stamps)) if len(daily) else daily
+
+
+def stub_yfinance(latency):
+    def download(tickers=None, start=None, end=None, period=None, interval='1d', **kwargs):
+        time.sleep(latency)
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        close = pd.DataFrame({t: stub_bars(t, start, end, period, interval) for t in symbols})
+        close.columns = pd.MultiIndex.from_product([['Close'], close.columns], names=['Price', 'Ticker'])
+        return close
+
+    class Ticker:
+        def __init__(self, ticker):
+            self.ticker = ticker
+
+        @property
+        def info(self):
+            time.sleep(latency)
+            closes = synthetic_closes(self.ticker)
+            return {'symbol': self.ticker, 'shortName': f'{self.ticker} Inc.', 'exchange': 'NMS',
+                    'sector': SECTORS[zlib.crc32(self.ticker.encode()) % len(SECTORS)],
+                    'regularMarketPrice': float(closes.iloc[-1]), 'previousClose': float(closes.iloc[-2])}
+
+        def history(self, start=None, end=None, period=None, interval='1d', **kwargs):
+            time.sleep(latency)
+            hist = stub_bars(self.ticker, start, end, period, interval).to_frame('Close')
+            if hist.index.tz is None:
+                hist.index = hist.index.tz_localize('America/New_York')
+            return hist
+
+    return download, Ticker
+
+
+def find(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def run_flow(app_path, uid, timeout, record):
+    from streamlit.testing.v1 import AppTest
+
+    def step(name, action):
+        started = time.perf_counter()
+        error = None
+        try:
+            at = action()
+            if at.exception:
+                error = at.exception[0].message
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        record(name, time.perf_counter() - started, error)
+
+    at = AppTest.from_file(str(app_path), default_timeout=timeout)
+    at.query_params['u'] = f'{uid}@loadtest.local'
+    at.query_params['d'] = uid
+    step('login', at.run)
+    step('portfolio_time_range', lambda: at.selectbox(key='pm_time_range').set_value('1 Year').run())
+    step('optimize_page', lambda: at.sidebar.selectbox[0].set_value('Portfolio Optimization').run())
+
+    def optimize():
+        at.session_state['tickers'] = list(UNIVERSE[:8])
+        at.session_state['weight'] = 0.3
+        at.session_state['port_name'] = f'load test {uid[-4:]}'
+        at.date_input[0].set_value(date.today() - timedelta(days=3 * 365))
+        return find(at.button, 'Run Portfolio Optimization').click().run()
+
+    step('optimize_run', optimize)
+    step('watchlist_page', lambda: at.sidebar.selectbox[0].set_value('Research and Watchlist').run())
+    step('watchlist_refresh', lambda: find(at.button, '🔄 Refresh All Data').click().run())
+
+
+def percentiles(durations):
+    values = np.array(durations) * 1000
+    return {
+        'count': len(values),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+    }
+
+
+def start_stubs(users, latency):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), stub_handler(StubDatabase(seed_tables(users)), latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def shared_runtime():
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.runtime import Runtime
+
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    return runtime
+
+
+@contextmanager
+def stubbed_services(base_url, market_latency, prewarm=False):
+    import fredapi
+    import streamlit as st
+    import yfinance as yf
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.secrets import Secrets
+
+    os.environ['GROQ_BASE_URL'] = base_url
+    secrets = Secrets()
+    secrets._secrets = {'SUPABASE_URL': base_url, 'SUPABASE_KEY': 'stub-key', 'FIN_API_KEY': 'stub',
+                        'API_KEY': 'stub', 'FED_API_KEY': 'stub'}
+    st.secrets = secrets
+    download, ticker = stub_yfinance(market_latency)
+
+    import services.prewarm
+    runtime = shared_runtime()
+    with mock.patch.object(Runtime, 'instance', classmethod(lambda cls: runtime)), \
+            mock.patch.object(Runtime, 'exists', classmethod(lambda cls: True)), \
+            mock.patch.object(yf, 'download', download), mock.patch.object(yf, 'Ticker', ticker), \
+            mock.patch.object(fredapi.Fred, 'root_url', f'{base_url}/fred'), \
+            mock.patch.object(services.prewarm, 'start_prewarmer', services.prewarm.start_prewarmer if prewarm
+                              else lambda: None):
+        yield
+
+
+def run_load_test(sessions, iterations, users, timeout, cache_mb):
+    from services.market_cache import market_cache
+
+    timings = defaultdict(list)
+    errors = defaultdict(list)
+    lock = threading.Lock()
+
+    def record(name, seconds, error):
+        with lock:
+            timings[name].append(seconds)
+            if error:
+                errors[name].append(error)
+
+    def session_worker(index):
+        for iteration in range(iterations):
+            run_flow(ROOT / 'app.py', user_id((index * iterations + iteration) % users), timeout, record)
+
+    market_cache.clear()
+    if cache_mb is not None:
+        market_cache.max_bytes = int(cache_mb * 2 ** 20)
+    started = time.perf_counter()
+    workers = [threading.Thread(target=session_worker, args=(i,)) for i in range(sessions)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    steps = sum(len(v) for v in timings.values())
+    return {
+        'sessions': sessions,
+        'iterations': iterations,
+        'elapsed_s': elapsed,
+        'flows_per_s': sessions * iterations / elapsed,
+        'reruns_per_s': steps / elapsed,
+        'steps': {name: {**percentiles(timings[name]), 'errors': len(errors[name]),
+                         'first_error': errors[name][0] if errors[name] else None}
+                  for name in STEPS if timings[name]},
+        'cache': market_cache.stats(),
+    }
+
+
+def print_report(report):
+    print(f"{report['sessions']} sessions x {report['iterations']} flows in {report['elapsed_s']:.1f}s: "
+          f"{report['flows_per_s']:.2f} flows/s, {report['reruns_per_s']:.2f} reruns/s")
+    print(f"{'step':<22} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10} {'errors':>7}")
+    for name, s in report['steps'].items():
+        print(f"{name:<22} {s['count']:>5} {s['p50_ms']:>10.1f} {s['p95_ms']:>10.1f} {s['p99_ms']:>10.1f} "
+              f"{s['max_ms']:>10.1f} {s['errors']:>7}")
+        if s['first_error']:
+            print(f"    first error: {s['first_error'][:200]}")
+    print(f"market cache: {report['cache']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Drive concurrent simulated sessions through the app against local '
+                                                 'stand-ins for Supabase, yfinance, FRED and Groq.')
+    parser.add_argument('--sessions', nargs='+', type=int, default=[1, 4, 16],
+                        help='concurrent session counts to test, one run each')
+    parser.add_argument('--iterations', type=int, default=2, help='flows per session')
+    parser.add_argument('--users', type=int, default=50, help='seeded users with portfolios and watchlists')
+    parser.add_argument('--db-latency', type=float, default=0.02, help='seconds per Supabase request')
+    parser.add_argument('--market-latency', type=float, default=0.15, help='seconds per yfinance call')
+    parser.add_argument('--fred-latency', type=float, default=0.2, help='seconds per FRED request')
+    parser.add_argument('--llm-latency', type=float, default=1.0, help='seconds per Groq completion')
+    parser.add_argument('--timeout', type=float, default=120, help='seconds allowed per rerun')
+    parser.add_argument('--cache-mb', type=float, default=None,
+                        help='override the market data cache size; 0 sends every fetch to the stubs')
+    parser.add_argument('--prewarm', action='store_true', help='run the background cache prewarmer during the test')
+    parser.add_argument('--output', type=Path, help='write the reports as JSON')
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').setLevel(logging.ERROR)
+    latency = {'db': args.db_latency, 'market': args.market_latency, 'fred': args.fred_latency, 'llm': args.llm_latency}
+    server, base_url = start_stubs(args.users, latency)
+    reports = []
+    with stubbed_services(base_url, args.market_latency, args.prewarm):
+        run_flow(ROOT / 'app.py', user_id(0), args.timeout, lambda *_: None)
+        for sessions in args.sessions:
+            report = run_load_test(sessions, args.iterations, args.users, args.timeout, args.cache_mb)
+            report['latency_s'] = latency
+            print_report(report)
+            reports.append(report)
+    server.shutdown()
+    if args.output:
+        args.output.write_text(json.dumps(reports, indent=2))
+        print(f'Wrote {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
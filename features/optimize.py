@@ -1,14 +1,21 @@
 import streamlit as st
-import numpy as np
 import pandas as pd
+import numpy as np
 from fredapi import Fred
-import yfinance as yf
 import plotly.express as px
 from datetime import datetime, date, timedelta
-from scipy.optimize import minimize
 import ssl
 import certifi
 from supabase import Client, create_client
+from analytics.backtest import walk_forward
+from analytics.charts import downsample_frame
+from analytics.optimization import min_variance, optimize_sharpe, portfolio_metrics, risk_contributions, risk_parity
+from analytics.performance import realized_performance
+from analytics.panel import PricePanel, annualized_covariance
+from services import market_data
+from services.factor_store import factor_model
+from services.symbols import invalid_ticker_message, validate_ticker
+from services.tracing import execute, span
 
 ssl._create_default_https_context = lambda: ssl.create_default_context(cafile=certifi.where())
 supabase_url = st.secrets["SUPABASE_URL"]
@@ -28,25 +35,36 @@ def save_optimal_port(stored_id, tickers, weights, metrics, timestamp, name):
         'port_name': name,
     }
 
-    response = supabase.table('saved_optimized_ports').insert([data]).execute()
+    response = execute(supabase.table('saved_optimized_ports').insert([data]))
     if response.data:
         st.success('Portfolio Saved!')
     else:
         st.error('Error saving portfolio. Please try again later.')
 
-def standard_deviation(weights, cov_matrix):
-    variance = weights.T @ cov_matrix @ weights
-    return np.sqrt(variance)
 
-def expected_return(weights, log_returns):
-    mean_returns = log_returns.mean().values
-    return np.dot(weights, mean_returns) * 252
+def solve_max_sharpe(log_returns, cov_matrix, risk_free_rate, max_weight):
+    return optimize_sharpe(log_returns, cov_matrix, risk_free_rate, max_weight)
+
+
+def solve_min_variance(log_returns, cov_matrix, risk_free_rate, max_weight):
+    return min_variance(cov_matrix, max_weight)
+
+
+def solve_risk_parity(log_returns, cov_matrix, risk_free_rate, max_weight):
+    return risk_parity(cov_matrix, max_weight)
+
+
+OBJECTIVES = {
+    "Maximum Sharpe Ratio": ('compute.optimize_sharpe', solve_max_sharpe),
+    "Minimum Variance": ('compute.min_variance', solve_min_variance),
+    "Risk Parity (Equal Risk Contribution)": ('compute.risk_parity', solve_risk_parity),
+}
 
-def sharpe_ratio(weights, log_returns, cov_matrix, risk_free_rate):
-    return (expected_return(weights, log_returns) - risk_free_rate) / standard_deviation(weights, cov_matrix)
 
-def neg_sharpe_ratio(weights, log_returns, cov_matrix, risk_free_rate):
-    return -sharpe_ratio(weights, log_returns, cov_matrix, risk_free_rate)
+def latest_risk_free_rate():
+    with span('fred.GS10') as s:
+        ten_year_treasury_rate = s.measure(fred.get_series_latest_release("GS10")) / 100
+    return ten_year_treasury_rate.iloc[-1]
 
 
 def portfolio_page():
@@ -67,12 +85,22 @@ def portfolio_page():
         if "port_name" not in st.session_state:
             st.session_state["port_name"] = None
 
+        def load_log_returns(start, end):
+            adj_close_df = pd.DataFrame()
+            for t in st.session_state.tickers:
+                data = market_data.download(t, start=start, end=end, auto_adjust=True)
+                if "Close" in data.columns:
+                    adj_close_df[t] = data["Close"]
+            with span('compute.log_returns', tickers=st.session_state.tickers):
+                panel = PricePanel.from_frame(adj_close_df, dtype='float64')
+                return panel.log_returns(), panel.return_dates()
+
         st.header("Portfolio Optimization Tool")
 
         with st.form(key="ticker_form", clear_on_submit=True):
             ticker_input = st.text_input("Enter Ticker").upper()
             add_ticker = st.form_submit_button("Add Ticker")
-            if add_ticker and yf.Ticker(ticker_input).info.get('regularMarketPrice'):
+            if add_ticker and ticker_input and validate_ticker(ticker_input):
                 try:
                     if ticker_input not in st.session_state.tickers:
                             if len(st.session_state.tickers) < 50:
@@ -84,6 +112,8 @@ def portfolio_page():
                         st.warning("Ticker already registered.")
                 except (ValueError, TypeError):
                     st.warning("Error retrieving ticker info.")
+            elif add_ticker and ticker_input:
+                st.warning(invalid_ticker_message(ticker_input))
 
             st.subheader("Current Tickers")
             write_list = []
@@ -114,8 +144,8 @@ def portfolio_page():
             save_name = st.form_submit_button('Save Name')
             if save_name:
                 if port_name:
-                    response = supabase.table('saved_optimized_ports').select('*').eq('port_name', port_name).eq(
-                        'user_id', stored_id).execute()
+                    response = execute(supabase.table('saved_optimized_ports').select('*').eq('port_name', port_name).eq(
+                        'user_id', stored_id))
                     rows = response.data
                     if rows:
                         st.warning('You already have a portfolio saved with this name.')
@@ -136,6 +166,10 @@ def portfolio_page():
         one_month_ago = today - timedelta(days=31)
         min_date = date(today.year - 20, today.month, today.day)
         start_date = st.date_input("Start Date (Minimum One Month Ago)", min_value=min_date, max_value=one_month_ago)
+        objective = st.selectbox("Objective", list(OBJECTIVES.keys()))
+        use_factor_model = st.checkbox("Use statistical factor risk model",
+                                       help="Replaces the sample covariance with a low-rank PCA factor model plus "
+                                            "per-ticker specific risk; steadier for large ticker lists.")
 
         if st.button("Run Portfolio Optimization"):
             if not st.session_state.tickers:
@@ -145,41 +179,24 @@ def portfolio_page():
             elif st.session_state.port_name is None:
                 st.warning("Set Portfolio Name first.")
             else:
-                adj_close_df = pd.DataFrame()
-                for t in st.session_state.tickers:
-                    data = yf.download(t, start=start_date, end=today, auto_adjust=True)
-                    if "Close" in data.columns:
-                        adj_close_df[t] = data["Close"]
-
-                log_returns = np.log(adj_close_df / adj_close_df.shift(1)).dropna()
-                cov_matrix = log_returns.cov() * 252
-
-                ten_year_treasury_rate = fred.get_series_latest_release("GS10") / 100
-                risk_free_rate = ten_year_treasury_rate.iloc[-1]
-
-                constraints = {"type": "eq", "fun": lambda w: np.sum(w) - 1}
-                bounds = [(0, st.session_state.weight) for _ in st.session_state.tickers]
-                initial_weights = np.array([1 / len(st.session_state.tickers)] * len(st.session_state.tickers))
-
-                optimize_results = minimize(
-                    neg_sharpe_ratio,
-                    initial_weights,
-                    args=(log_returns, cov_matrix, risk_free_rate),
-                    method="SLSQP",
-                    constraints=constraints,
-                    bounds=bounds
-                )
-
-                optimal_weights = optimize_results.x
-                optimal_portfolio_return = expected_return(optimal_weights, log_returns)
-                optimal_portfolio_volatility = standard_deviation(optimal_weights, cov_matrix)
-                optimal_sharpe_ratio = sharpe_ratio(optimal_weights, log_returns, cov_matrix, risk_free_rate)
-
-                metrics = {
-                    "expected_return": float(optimal_portfolio_return),
-                    "volatility": float(optimal_portfolio_volatility),
-                    "sharpe_ratio": float(optimal_sharpe_ratio),
-                }
+                log_returns, _ = load_log_returns(start_date, today)
+                risk_free_rate = latest_risk_free_rate()
+                span_name, solver = OBJECTIVES[objective]
+                try:
+                    if use_factor_model:
+                        cov_matrix = factor_model(st.session_state.tickers, start=start_date)
+                    else:
+                        with span('compute.returns_cov', tickers=st.session_state.tickers):
+                            cov_matrix = annualized_covariance(log_returns)
+                    with span(span_name, tickers=st.session_state.tickers):
+                        optimal_weights = solver(log_returns, cov_matrix, risk_free_rate, st.session_state.weight)
+                except (np.linalg.LinAlgError, ValueError) as e:
+                    st.error(f"Optimization failed; try an earlier start date or fewer tickers. Error: {e}")
+                    return
+                metrics = portfolio_metrics(optimal_weights, log_returns, cov_matrix, risk_free_rate)
+                optimal_portfolio_return = metrics["expected_return"]
+                optimal_portfolio_volatility = metrics["volatility"]
+                optimal_sharpe_ratio = metrics["sharpe_ratio"]
 
                 st.session_state['optimal_weights'] = optimal_weights
                 st.session_state['metrics'] = metrics
@@ -188,7 +205,15 @@ def portfolio_page():
                     x=st.session_state.tickers,
                     y=optimal_weights,
                     labels={"x": "Ticker", "y": "Optimal Weight"},
-                    title=f'Optimal Weights by Ticker for Portfolio "{st.session_state.port_name}"'
+                    title=f'Optimal Weights by Ticker for Portfolio "{st.session_state.port_name}" ({objective})'
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+                fig = px.bar(
+                    x=st.session_state.tickers,
+                    y=risk_contributions(optimal_weights, cov_matrix),
+                    labels={"x": "Ticker", "y": "Share of Portfolio Variance"},
+                    title="Risk Contribution by Ticker"
                 )
                 st.plotly_chart(fig, use_container_width=True)
 
@@ -217,6 +242,83 @@ def portfolio_page():
                     name=st.session_state.port_name,
                 )
 
+        st.subheader("Walk-Forward Backtest")
+        st.caption("Re-fits the max-Sharpe weights on a rolling training window, holds them until the next "
+                   "rebalance, and compares the out-of-sample result with an equal-weight portfolio.")
+        train_options = {"6 Months": 126, "1 Year": 252, "2 Years": 504}
+        step_options = {"Monthly": 21, "Quarterly": 63}
+        train_choice = st.selectbox("Training Window", list(train_options.keys()), index=1)
+        step_choice = st.selectbox("Rebalance Frequency", list(step_options.keys()))
+
+        if st.button("Run Walk-Forward Backtest"):
+            if not st.session_state.tickers:
+                st.warning("Add at least one ticker first.")
+            elif st.session_state.weight is None:
+                st.warning("Set maximum weight first.")
+            else:
+                log_returns, return_dates = load_log_returns(start_date, today)
+                risk_free_rate = latest_risk_free_rate()
+                try:
+                    with st.spinner("Fitting walk-forward windows..."), \
+                            span('compute.walk_forward', tickers=st.session_state.tickers):
+                        result = walk_forward(log_returns, risk_free_rate, st.session_state.weight,
+                                              train=train_options[train_choice], step=step_options[step_choice])
+                except ValueError as e:
+                    st.warning(f"{e} Choose an earlier start date or a shorter training window.")
+                else:
+                    equity_df = pd.DataFrame({
+                        "Date": return_dates[result['windows'][0][1]:],
+                        "Walk-Forward Max Sharpe": result['equity'] * 100,
+                        "Equal Weight": result['equal_weight_equity'] * 100,
+                    })
+                    fig = px.line(downsample_frame(equity_df, "Date", ["Walk-Forward Max Sharpe", "Equal Weight"]),
+                                  x="Date", y=["Walk-Forward Max Sharpe", "Equal Weight"],
+                                  labels={"value": "Growth of $100"},
+                                  title=f"Out-of-Sample Equity ({len(result['windows'])} {step_choice.lower()} rebalances)")
+                    st.plotly_chart(fig, use_container_width=True)
+
+                    labels = {
+                        'total_return': 'Total Return',
+                        'annual_return': 'Annualized Return',
+                        'volatility': 'Annualized Volatility',
+                        'sharpe_ratio': 'Sharpe Ratio',
+                        'max_drawdown': 'Max Drawdown',
+                        'avg_turnover': 'Average Turnover per Rebalance',
+                        'annual_turnover': 'Annual Turnover',
+                    }
+                    st.dataframe(pd.DataFrame({
+                        "Metric": list(labels.values()),
+                        "Walk-Forward Max Sharpe": [result['stats'][k] for k in labels],
+                        "Equal Weight": [result['equal_weight_stats'][k] for k in labels],
+                    }), hide_index=True)
+
+    def rescore_saved_ports(saved_ports):
+        tickers = sorted({t for p in saved_ports for t in p['tickers']})
+        weights = pd.DataFrame(
+            [dict(zip(p['tickers'], p['weights'])) for p in saved_ports],
+            index=[p['port_name'] for p in saved_ports], columns=tickers,
+        ).fillna(0.0)
+        start_dates = pd.to_datetime([p['created_at'] for p in saved_ports], utc=True, format='ISO8601').tz_convert(None)
+
+        with st.spinner(f"Re-scoring {len(saved_ports)} portfolios across {len(tickers)} tickers..."):
+            prices = market_data.download(tickers + ['^GSPC'], start=start_dates.min() - timedelta(days=7),
+                                          auto_adjust=True, progress=False)['Close']
+            risk_free_rate = latest_risk_free_rate()
+            with span('compute.realized_performance', tickers=tickers):
+                scores = realized_performance(prices, weights, start_dates, risk_free_rate=risk_free_rate)
+
+        st.dataframe(pd.DataFrame({
+            'Portfolio': scores.index,
+            'Saved': start_dates.strftime('%Y-%m-%d'),
+            'Trading Days': scores['days'],
+            'Realized Return': scores['realized_return'].map(lambda v: f'{v * 100:.2f}%' if pd.notna(v) else 'n/a'),
+            'S&P 500 Return': scores['benchmark_return'].map(lambda v: f'{v * 100:.2f}%' if pd.notna(v) else 'n/a'),
+            'Excess Return': scores['excess_return'].map(lambda v: f'{v * 100:.2f}%' if pd.notna(v) else 'n/a'),
+            'Annualized Volatility': scores['volatility'].map(lambda v: f'{v * 100:.2f}%' if pd.notna(v) else 'n/a'),
+            'Sharpe Ratio': scores['sharpe_ratio'].map(lambda v: f'{v:.4f}' if pd.notna(v) else 'n/a'),
+        }), hide_index=True)
+        st.caption("Buy-and-hold from the first trading day after each save date, against the S&P 500 over the same days.")
+
     def show_saved_tab():
         stored_id = st.session_state.get("user_id")
         if not stored_id:
@@ -225,9 +327,12 @@ def portfolio_page():
 
         st.header("Saved Portfolios")
 
-        response = supabase.table('saved_optimized_ports').select("*").eq("user_id", stored_id).execute()
+        response = execute(supabase.table('saved_optimized_ports').select("*").eq("user_id", stored_id))
         saved_ports = response.data or []
 
+        if saved_ports and st.button("Re-score All Saved Portfolios"):
+            rescore_saved_ports(saved_ports)
+
         if saved_ports:
             portfolio_options = [f'{p["port_name"]}' for p in saved_ports]
             selected_port = st.selectbox("Select a saved portfolio to display", portfolio_options)
@@ -263,7 +368,7 @@ def portfolio_page():
 
                 if fig:
                     if st.button('Delete Saved Portfolio'):
-                        supabase.table('saved_optimized_ports').delete().eq("user_id", stored_id).eq('port_name', selected_port).execute()
+                        execute(supabase.table('saved_optimized_ports').delete().eq("user_id", stored_id).eq('port_name', selected_port))
                         st.rerun()
             else:
                 st.warning("No matching portfolio found.")
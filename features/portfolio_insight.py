@@ -1,8 +1,9 @@
 import streamlit as st
 from groq import Groq
-import pandas as pd
 from supabase import Client, create_client
-import yfinance as yf
+from services import market_data
+from services.holdings import holdings_snapshot
+from services.tracing import execute, span
 
 supabase_url = st.secrets["SUPABASE_URL"]
 supabase_key = st.secrets["SUPABASE_KEY"]
@@ -18,16 +19,12 @@ def show_insights():
         return
     st.title('AI Portfolio Analysis')
     try:
-        response = supabase.table('user_portfolio').select('ticker_symbol', 'share_count').eq('user_id',stored_id).execute()
-        rows = response.data
+        holdings = holdings_snapshot(stored_id)
 
-        if not rows:
+        if holdings.empty:
             st.error('Portfolio not found.')
-
-        df = pd.DataFrame(rows)
-
-        if all(col in df.columns for col in ['ticker_symbol', 'share_count']):
-            tickers = df['ticker_symbol'].tolist()
+        else:
+            tickers = holdings.tickers
             info_dict = {}
             keys_to_keep = [
                 "symbol",
@@ -50,19 +47,9 @@ def show_insights():
             def filter_info(info: dict, keys_to_keep: list) -> dict:
                 return {k: info.get(k) for k in keys_to_keep if k in info}
             for ticker in tickers:
-                info = yf.Ticker(ticker).info
+                info = holdings.info.get(ticker) or market_data.ticker_info(ticker)
                 info_dict[ticker] = filter_info(info, keys_to_keep)
-            tickers_data = yf.download(tickers=tickers, period='1d', interval='1m', auto_adjust=True)['Close'].iloc[-1].ffill().bfill()
-            df['current_price'] = df['ticker_symbol'].map(tickers_data)
-            df['total_value'] = df['share_count'].astype(float) * df['current_price'].astype(float)
-            for _, row in df.iterrows():
-                ticker = row['ticker_symbol']
-                price = row['current_price']
-                last_close = yf.Ticker(ticker).info['previousClose']
-                day_change = price - last_close
-                total_change = day_change * float(row['share_count'])
-                df.loc[row.name, 'day_change'] = day_change
-                df.loc[row.name, 'total_change'] = total_change
+            df = holdings.valued()
             df = df.rename(columns={
                 'ticker_symbol': 'Ticker',
                 'share_count': 'Shares',
@@ -71,7 +58,7 @@ def show_insights():
                 'day_change': 'Day Change Per Share ($)',
                 'total_change': 'Total Day Change ($)',
             })
-            cash_response = supabase.table('user_cash').select('cash_amount').eq('user_id', stored_id).execute()
+            cash_response = execute(supabase.table('user_cash').select('cash_amount').eq('user_id', stored_id))
             current_cash = cash_response.data[0]['cash_amount'] if cash_response.data else 0
             top_holdings = df.nlargest(3, 'Total Value ($)')
             highest_values_str = ', '.join(
@@ -122,14 +109,15 @@ def show_insights():
 
             try:
                 # noinspection PyTypeChecker
-                response = groq_client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
-                    messages=[
-                        {"role": "system", "content": system_content},
-                        {"role": "user", "content": "Please analyze this portfolio and provide your summary."}
-                    ],
-                    temperature=0.0
-                )
+                with span('groq.chat', tickers=tickers):
+                    response = groq_client.chat.completions.create(
+                        model="llama-3.1-8b-instant",
+                        messages=[
+                            {"role": "system", "content": system_content},
+                            {"role": "user", "content": "Please analyze this portfolio and provide your summary."}
+                        ],
+                        temperature=0.0
+                    )
 
                 analysis = response.choices[0].message.content.strip()
 
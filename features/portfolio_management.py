@@ -1,153 +1,139 @@
 import pandas as pd
 import streamlit as st
-import yfinance as yf
 from supabase import create_client, Client
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
-from collections import defaultdict
 import numpy as np
-import time
-from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from postgrest.exceptions import APIError
 from features.portfolio_insight import show_insights
-from reportlab.lib.units import inch
+from analytics.charts import downsample_frame
+from analytics.lots import METHODS, LotBook, unrealized_gains
+from analytics.performance import normalized_comparison, portfolio_value_history
+from analytics.report import generate_portfolio_pdf
+from analytics.panel import PricePanel
+from analytics.risk import (correlation_matrix, historical_var_from_returns, parametric_var, position_weights,
+                            return_histogram, var_decomposition)
+from analytics.stress import BENCHMARK, HISTORY_START, parse_overrides, stress_test
+from analytics.trades import apply_trades, fill_missing_prices, parse_trades, transaction_rows
+from analytics.valuation import portfolio_summary, sector_allocation
+from services import market_data
+from services.concurrency import submit
+from services.ewma_store import ewma_covariance
+from services.factor_store import factor_model
+from services.holdings import holdings_snapshot, invalidate_holdings, reset_portfolio_rows, retry_if_fail
+from services.lots import invalidate_lot_books, lot_book
+from services.symbols import invalid_ticker_message, validate_ticker
+from services.tracing import execute, span
 supabase_url = st.secrets["SUPABASE_URL"]
 supabase_key = st.secrets["SUPABASE_KEY"]
 supabase: Client = create_client(supabase_url, supabase_key)
 
 
 def show_port_manager():
+    reset_portfolio_rows()
     tab1, tab2, tab3, tab4 = st.tabs(["Portfolio Management", "Transaction History", 'Portfolio Risk Analysis', 'AI Analysis'])
 
-    def retry_if_fail(ticker, start_date=None, end_date=None, max_retries=10, sleep_sec=0.5):
-        for attempt in range(max_retries):
-            try:
-                data = yf.download(
-                    tickers=ticker,
-                    start=start_date,
-                    end=end_date,
-                    auto_adjust=True,
-                    progress=False
-                )
-                if not data.empty and "Close" in data.columns:
-                    return data["Close"]
-            except (KeyError, IndexError, ValueError, TypeError, AttributeError,
-                    ConnectionError, TimeoutError, OSError, Exception):
-                pass
-            time.sleep(sleep_sec)
-        return pd.Series(dtype=float)
-
     def port_manager_tab():
         stored_id = st.session_state.get("user_id")
         if not stored_id:
             st.error("No user ID found. Please log in again.")
             return
 
-        def log_transaction(stored_id, date, txn_type, ticker, shares, price_per_share, total_value, notes=''):
-            if hasattr(date, 'isoformat'):
-                date = date.isoformat()
-            transaction_data = {'user_id': stored_id,
-                                'txn_date': date,
-                                'txn_type': txn_type,
-                                'ticker_symbol': ticker,
-                                'shares': shares,
-                                'price_per_share': price_per_share,
-                                'total_value': total_value,
-                                'notes': notes}
-            try:
-                supabase.table('user_transactions').insert(transaction_data).execute()
-            except Exception as e:
-                st.error(f"Failed to log transaction: {e}")
+        def apply_trade(txn_type, ticker, shares, price_per_share, notes):
+            response = execute(supabase.rpc('apply_trade', {'p_user_id': stored_id,
+                                                            'p_ticker': ticker,
+                                                            'p_txn_type': txn_type,
+                                                            'p_shares': float(shares),
+                                                            'p_price': float(price_per_share),
+                                                            'p_notes': notes or 'N/A',
+                                                            'p_txn_date': datetime.now().isoformat()}))
+            invalidate_holdings(stored_id)
+            return float(response.data)
 
         def save_cash(amount):
             try:
-                existing_cash = supabase.table("user_cash").select("*").eq("user_id", stored_id).execute()
+                existing_cash = execute(supabase.table("user_cash").select("*").eq("user_id", stored_id))
 
                 if existing_cash.data:
-                    supabase.table("user_cash").update({"cash_amount": amount}).eq("user_id", stored_id).execute()
+                    execute(supabase.table("user_cash").update({"cash_amount": amount}).eq("user_id", stored_id))
                 else:
-                    supabase.table("user_cash").insert({"user_id": stored_id, "cash_amount": amount}).execute()
+                    execute(supabase.table("user_cash").insert({"user_id": stored_id, "cash_amount": amount}))
 
             except Exception as e:
                 st.error(f"Failed to save cash assets: {e}")
 
-        def generate_portfolio_pdf(df, port_summary, comparison_df, sector_totals):
-            date = datetime.now().date()
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer)
-            story = []
-            styles = getSampleStyleSheet()
-            story.append(Paragraph(f"📊 Portfolio Summary: {date}", styles['Title']))
-            story.append(Spacer(1, 12))
-            if df is not None and not df.empty:
-                df_rounded = df.round(2)
-                data = [df_rounded.columns.to_list()] + df_rounded.values.tolist()
-                table = Table(data, hAlign='LEFT')
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ]))
-                story.append(Paragraph("Portfolio Holdings:", styles['Heading2']))
-                story.append(table)
-                story.append(Spacer(0.5, 6))
-
-            if port_summary is not None and not port_summary.empty:
-                data = [port_summary.columns.to_list()] + port_summary.values.tolist()
-                table = Table(data, hAlign='LEFT')
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ]))
-                story.append(Paragraph("Portfolio Summary Metrics:", styles['Heading2']))
-                story.append(table)
-                story.append(Spacer(1, 12))
-
-            if comparison_df is not None and not comparison_df.empty:
-                plt.figure()
-                plt.plot(comparison_df['Date'], comparison_df['Portfolio'], label='Portfolio')
-                plt.plot(comparison_df['Date'], comparison_df["S&P 500"], label='S&P 500')
-                plt.xlabel('Date')
-                plt.ylabel('Value')
-                plt.title('Portfolio Performance vs S&P 500')
-                plt.legend()
-                image_buffer = BytesIO()
-                plt.savefig(image_buffer, format='png')
-                plt.close()
-                image_buffer.seek(0)
-                img = Image(image_buffer, width=5 * inch, height=3 * inch)
-                story.append(img)
-
-            if sector_totals is not None and not sector_df.empty:
-                labels = sector_df['Sector']
-                sizes = sector_df['Value']
-                plt.figure()
-                plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
-                plt.axis('equal')
-                plt.title('Portfolio Allocation by Sector')
-                plt.legend()
-                pie_buffer = BytesIO()
-                plt.savefig(pie_buffer, format='png')
-                plt.close()
-                pie_buffer.seek(0)
-                pie = Image(pie_buffer, width=5 * inch, height=3* inch)
-                story.append(pie)
-
-
-            doc.build(story)
-            buffer.seek(0)
-            return buffer
+        def import_trades(uploaded):
+            try:
+                raw = pd.read_csv(uploaded, dtype=str, skipinitialspace=True)
+            except Exception as e:
+                st.error(f'Could not read {uploaded.name}: {e}')
+                return
+
+            with span('compute.parse_trades'):
+                trades, errors = parse_trades(raw)
+            if errors:
+                st.error(f'{len(errors)} invalid row(s); nothing was imported.')
+                st.write(errors[:50])
+                return
+            if trades.empty:
+                st.warning('No trades found in the file.')
+                return
+
+            symbols = sorted(trades['ticker_symbol'].unique())
+            with st.spinner(f'Validating {len(symbols)} symbols...'):
+                closes = market_data.download(symbols, start=trades['txn_date'].min() - timedelta(days=7),
+                                              end=trades['txn_date'].max() + timedelta(days=1),
+                                              auto_adjust=False, progress=False)['Close']
+            if isinstance(closes, pd.Series):
+                closes = closes.to_frame(symbols[0])
+            unknown = [t for t in symbols if t not in closes.columns or closes[t].isna().all()]
+            if unknown:
+                st.error(f"Unknown or delisted symbol(s): {', '.join(unknown)}; nothing was imported.")
+                return
+
+            trades = fill_missing_prices(trades, closes)
+            unpriced = trades.loc[trades['price_per_share'].isna(), 'row'].tolist()
+            if unpriced:
+                st.error(f'No price available for row(s) {unpriced[:50]}; nothing was imported.')
+                return
+
+            existing = execute(supabase.table('user_portfolio').select('ticker_symbol', 'share_count')
+                               .eq('user_id', stored_id).in_('ticker_symbol', symbols))
+            with span('compute.apply_trades', tickers=symbols):
+                _, oversold = apply_trades(
+                    {r['ticker_symbol']: float(r['share_count']) for r in existing.data or []}, trades)
+            if oversold:
+                st.error(f"Trades sell more shares than held for: {', '.join(oversold)}; nothing was imported.")
+                return
 
+            try:
+                execute(supabase.rpc('apply_trades', {'p_user_id': stored_id,
+                                                      'p_trades': transaction_rows(stored_id, trades)}))
+            except APIError as e:
+                st.error(f'Failed to import trades: {e.message}')
+                return
+            except Exception as e:
+                st.error(f'Failed to import trades: {e}')
+                return
+            finally:
+                invalidate_holdings(stored_id)
+            st.success(f'Imported {len(trades)} trades across {len(symbols)} symbols.')
 
         st.title('📊Portfolio Management📈')
 
+        time_options = {
+            "1 Month": 30,
+            "3 Months": 90,
+            "6 Months": 180,
+            "1 Year": 365,
+            "3 Years": 365 * 3,
+            "5 Years": 365 * 5
+        }
+        start_date = datetime.today() - timedelta(days=time_options[st.session_state.get('pm_time_range', '3 Months')])
+        cash_future = submit(execute, supabase.table('user_cash').select('cash_amount').eq('user_id', stored_id))
+        sp500_future = submit(market_data.download, "^GSPC", start=start_date, auto_adjust=True, progress=False)
+
         with st.form(key='stock_form', clear_on_submit=True):
             ticker = st.text_input('Ticker:').upper()
             s_count = st.number_input('Shares:', max_value=(10.0 ** 7), min_value=0.0001, step=0.0001, format="%.4f", value=None)
@@ -157,7 +143,7 @@ def show_port_manager():
             refresh_button = st.form_submit_button(label='Refresh Data')
 
             st.divider()
-            cash_response = supabase.table('user_cash').select('cash_amount').eq('user_id', stored_id).execute()
+            cash_response = cash_future.result()
             current_cash = cash_response.data[0]['cash_amount'] if cash_response.data else 0
             cash_amount = st.number_input(
                 'Cash Assets ($)',
@@ -171,6 +157,7 @@ def show_port_manager():
             if saved_cash:
                 if cash_amount >= 0:
                     save_cash(cash_amount)
+                    current_cash = cash_amount
                     st.success(f'Saved ${cash_amount} to your Portfolio')
                 else:
                     st.warning('Cash must be at least zero.')
@@ -179,64 +166,18 @@ def show_port_manager():
                 try:
                     if ticker == '':
                         st.warning('Please enter a ticker symbol.')
+                    elif not validate_ticker(ticker):
+                        st.warning(invalid_ticker_message(ticker))
                     else:
-                        yf_ticker = yf.Ticker(ticker)
-                        price_per_share = yf_ticker.info.get('regularMarketPrice')
-                        last_close = yf_ticker.info.get('previousClose')
-                        if not notes:
-                            notes = 'N/A'
-                        if yf_ticker and price_per_share and last_close and float(s_count) > 0:
+                        info = market_data.ticker_info(ticker)
+                        price_per_share = info.get('regularMarketPrice')
+                        last_close = info.get('previousClose')
+                        if info and price_per_share and last_close and float(s_count) > 0:
                             try:
-                                now = datetime.now()
-                                txn_type = 'Buy'
-                                existing_response = supabase.table('user_portfolio').select('*').eq('user_id',
-                                                                                                    stored_id).eq(
-                                    'ticker_symbol', ticker).execute()
-                                if existing_response.data:
-
-                                    existing_record = existing_response.data[0]
-                                    existing_shares = float(existing_record['share_count'])
-                                    new_total_shares = existing_shares + float(s_count)
-
-                                    update_data = {
-                                        'share_count': str(new_total_shares),
-
-                                    }
-
-                                    result = supabase.table('user_portfolio').update(update_data).eq('user_id',
-                                                                                                     stored_id).eq(
-                                        'ticker_symbol', ticker).execute()
-
-                                    if result.data:
-                                        total_value = float(price_per_share) * float(s_count)
-                                        log_transaction(stored_id, now, txn_type, ticker, s_count, price_per_share,
-                                                        total_value,
-                                                        notes)
-                                        st.success(
-                                            f'Updated {ticker}: Added {s_count} shares. New total: {new_total_shares} shares.')
-                                    else:
-                                        st.error(f'Failed to update {ticker} in Portfolio.')
-
-                                else:
-                                    data_to_save = {
-                                        'user_id': stored_id,
-                                        'ticker_symbol': ticker,
-                                        'share_count': s_count
-                                    }
-
-                                    result = supabase.table('user_portfolio').insert(data_to_save).execute()
-                                    if result.data:
-                                        total_value = float(price_per_share) * float(s_count)
-                                        log_transaction(stored_id, now, txn_type, ticker, s_count, price_per_share,
-                                                        total_value,
-                                                        notes)
-                                        st.success(f'Added {s_count} shares of {ticker} to Portfolio.')
-                                    else:
-                                        st.error(f'Failed to add {ticker} to Portfolio.')
-
-                            except Exception as e:
-                                st.error(f'Failed to add {ticker} to Portfolio. Error: {e}')
-
+                                new_total_shares = apply_trade('Buy', ticker, s_count, price_per_share, notes)
+                                st.success(f'Added {s_count} shares of {ticker}. New total: {new_total_shares} shares.')
+                            except APIError as e:
+                                st.error(f'Failed to add {ticker} to Portfolio. Error: {e.message}')
                         else:
                             st.warning(f'Could not fetch data for {ticker}.')
                 except Exception as e:
@@ -247,83 +188,64 @@ def show_port_manager():
                     if ticker == '':
                         st.warning('Please enter a ticker symbol.')
                     else:
-                        yf_ticker = yf.Ticker(ticker)
-                        price_per_share = yf_ticker.info.get('regularMarketPrice')
-                        now = datetime.now()
-                        total_value = float(price_per_share) * float(s_count)
-                        if not notes:
-                            notes = 'N/A'
-                        if yf_ticker and price_per_share and float(s_count) > 0 and notes:
+                        info = market_data.ticker_info(ticker)
+                        price_per_share = info.get('regularMarketPrice')
+                        if info and price_per_share and float(s_count) > 0:
                             try:
-                                existing_response = supabase.table('user_portfolio').select('*').eq('user_id',
-                                                                                                    stored_id).eq(
-                                    'ticker_symbol', ticker).execute()
-                                if existing_response.data:
-                                    txn_type = 'Sell'
-                                    existing_record = existing_response.data[0]
-                                    existing_shares = float(existing_record['share_count'])
-                                    new_total_shares = existing_shares - float(s_count)
-                                    if new_total_shares > 0:
-                                        update_data = {'share_count': str(new_total_shares)}
-                                        result = supabase.table('user_portfolio').update(update_data).eq('user_id',
-                                                                                                         stored_id).eq(
-                                            'ticker_symbol', ticker).execute()
-                                        if result.data:
-                                            log_transaction(stored_id, now, txn_type, ticker, s_count, price_per_share,
-                                                            total_value, notes)
-                                            st.success(f'Removed {s_count} shares of {ticker} from Portfolio.')
-                                    elif new_total_shares == 0:
-                                        supabase.table('user_portfolio').delete() \
-                                            .eq('user_id', stored_id).eq('ticker_symbol', ticker).execute()
-                                        st.success(f'Removed all shares of {ticker} from your portfolio.')
-                                        log_transaction(stored_id, now, txn_type, ticker, s_count, price_per_share,
-                                                        total_value,
-                                                        notes)
-                                    else:
-                                        st.error(
-                                            f'You are trying to remove more shares of {ticker} than you currently own.')
-
+                                new_total_shares = apply_trade('Sell', ticker, s_count, price_per_share, notes)
+                                if new_total_shares > 0:
+                                    st.success(f'Removed {s_count} shares of {ticker} from Portfolio.')
                                 else:
-                                    st.warning(f'You do not own any shares of {ticker}.')
-                            except Exception as e:
-                                st.error(f'Error removing {s_count} shares of {ticker}. Error: {e}')
+                                    st.success(f'Removed all shares of {ticker} from your portfolio.')
+                            except APIError as e:
+                                st.error(e.message)
+                        else:
+                            st.warning(f'Could not fetch data for {ticker}.')
                 except Exception as e:
                     st.error(f'Failed to remove {s_count} shares of {ticker}. Error: {e}')
 
             if refresh_button:
                 with st.spinner('Refreshing...'):
+                    invalidate_holdings(stored_id)
                     st.rerun()
 
+        with st.expander('Import Trades from CSV'):
+            st.caption('Columns: date, type (Buy/Sell), ticker, shares, price (optional), notes (optional). '
+                       'Missing prices are filled with the close on the trade date.')
+            uploaded = st.file_uploader('Trade history', type=['csv'], key='pm_trade_import')
+            if uploaded is not None and st.button('Import Trades'):
+                import_trades(uploaded)
+
         st.subheader('Current Portfolio')
+        cost_method = st.selectbox('Cost Basis Method', METHODS, key='pm_cost_method')
 
         try:
-            response = supabase.table('user_portfolio').select('ticker_symbol', 'share_count').eq('user_id',
-                                                                                                  stored_id).execute()
-            rows = response.data
+            holdings = holdings_snapshot(stored_id)
 
-            if not rows:
+            if holdings.empty:
                 st.info('Portfolio not found.')
-
-            df = pd.DataFrame(rows)
-
-            if all(col in df.columns for col in ['ticker_symbol', 'share_count']):
-                tickers = df['ticker_symbol'].tolist()
-                tickers_data = yf.download(tickers=tickers, period='5d', interval='1m', auto_adjust=True, progress=False)['Close'].ffill().bfill()
-                latest_prices = tickers_data.iloc[-1]
-                df['current_price'] = df['ticker_symbol'].map(latest_prices)
-                for index, row in df.iterrows():
-                    if pd.isna(row['current_price']):
-                        retry_price = retry_if_fail(row['ticker_symbol'], start_date=datetime.now() - timedelta(days=1), end_date=datetime.now())
-                        df.at[index, 'current_price'] = retry_price
-                df['total_value'] = df['share_count'].astype(float) * df['current_price'].astype(float)
-                for _, row in df.iterrows():
-                    ticker = row['ticker_symbol']
-                    price = row['current_price']
-                    last_close = yf.Ticker(ticker).info['previousClose']
-                    day_change = price - last_close
-                    total_change = day_change * float(row['share_count'])
-                    df.loc[row.name, 'day_change'] = day_change
-                    df.loc[row.name, 'total_change'] = total_change
+            else:
+                tickers = holdings.tickers
+                lots_future = submit(lot_book, stored_id, cost_method)
+                history_future = submit(market_data.download, tickers, start=start_date, auto_adjust=True, progress=False)
+                sectors_future = submit(execute, supabase.table("ticker_info").select("ticker", "sector").in_("ticker", tickers),
+                                        cache_lookup=True)
+
+                if holdings.nightly:
+                    st.caption(f"Prices as of the last market close (snapshot computed at "
+                               f"{holdings.nightly['computed_at'][:16].replace('T', ' ')} UTC)")
+                latest_prices = holdings.latest_prices()
+                with span('compute.valuation', tickers=tickers):
+                    df = holdings.valued()
+                try:
+                    book = lots_future.result()
+                except ValueError as e:
+                    st.warning(f'Cost basis unavailable: {e}')
+                    book = LotBook(cost_method)
+                lots = book.positions()
+                with span('compute.unrealized_gains', tickers=tickers):
+                    lots = unrealized_gains(lots, latest_prices)
+                df = df.merge(lots[['ticker_symbol', 'cost_basis', 'unrealized_gain']], on='ticker_symbol', how='left')
                 df = df.rename(columns={
                     'ticker_symbol': 'Ticker',
                     'share_count': 'Shares',
@@ -331,17 +253,14 @@ def show_port_manager():
                     'total_value': 'Total Value ($)',
                     'day_change': 'Day Change Per Share ($)',
                     'total_change': 'Total Day Change ($)',
+                    'cost_basis': 'Cost Basis ($)',
+                    'unrealized_gain': 'Unrealized Gain ($)',
                 })
                 st.dataframe(df, hide_index=True)
 
                 st.subheader('Portfolio Summary')
-                stock_port_value = df['Total Value ($)'].sum() if not df.empty else 0
-                cash_response = supabase.table('user_cash').select('cash_amount').eq('user_id',
-                                                                                     stored_id).execute() if not df.empty else 0
-                cash_assets = cash_response.data[0]['cash_amount'] if cash_response.data else 0
-                port_value = float(cash_assets) + float(stock_port_value) if not df.empty else 0
-                port_change = df['Total Day Change ($)'].sum() if not df.empty else 0
-                port_pct_change = (port_change / port_value) * 100 if port_value > 0 else 0
+                summary = portfolio_summary(df.rename(columns={'Total Value ($)': 'total_value',
+                                                               'Total Day Change ($)': 'total_change'}), current_cash)
 
                 port_summary = pd.DataFrame({
                     "Metric": [
@@ -349,66 +268,43 @@ def show_port_manager():
                         "Total Stock Value",
                         "Total Portfolio Value",
                         "Portfolio Change ($)",
-                        "Portfolio Change (%)"
+                        "Portfolio Change (%)",
+                        "Unrealized Gain ($)",
+                        "Realized Gain ($)"
                     ],
                     'Value': [
-                        f'${cash_assets:,.2f}',
-                        f'${stock_port_value:,.2f}',
-                        f'${port_value:,.2f}',
-                        f'${port_change:,.2f}',
-                        f'{port_pct_change:,.2f}%'
+                        f"${summary['cash']:,.2f}",
+                        f"${summary['stock_value']:,.2f}",
+                        f"${summary['total_value']:,.2f}",
+                        f"${summary['day_change']:,.2f}",
+                        f"{summary['day_change_pct']:,.2f}%",
+                        f"${df['Unrealized Gain ($)'].sum():,.2f}",
+                        f"${lots['realized_gain'].sum():,.2f}"
                     ]})
 
                 st.dataframe(port_summary, hide_index=True)
 
                 st.subheader('Portfolio Performance vs S&P 500')
 
-                time_options = {
-                    "1 Month": 30,
-                    "3 Months": 90,
-                    "6 Months": 180,
-                    "1 Year": 365,
-                    "3 Years": 365 * 3,
-                    "5 Years": 365 * 5
-                }
-                time_choice = st.selectbox("Select Time Range", list(time_options.keys()), index=1)
-                days = time_options[time_choice]
+                time_choice = st.selectbox("Select Time Range", list(time_options.keys()), index=1, key='pm_time_range')
 
                 if not df.empty:
-                    tickers = df['Ticker'].tolist()
                     shares = df.set_index('Ticker')['Shares'].to_dict()
-                    start_date = datetime.today() - timedelta(days=days)
-
-                    portfolio_prices = yf.download(tickers, start=start_date, auto_adjust=True, progress=False)['Close'].ffill().bfill()
 
-                    if isinstance(portfolio_prices, pd.Series):
-                        portfolio_prices = portfolio_prices.to_frame()
+                    portfolio_prices = history_future.result()['Close'].ffill().bfill()
 
-                    valid_tickers = [t for t in tickers if
-                                     t in portfolio_prices.columns and not portfolio_prices[t].isnull().all()]
-                    shares = {t: shares[t] for t in valid_tickers}
+                    with span('compute.portfolio_history', tickers=tickers):
+                        portfolio_value = portfolio_value_history(portfolio_prices, shares)
 
-                    portfolio_value = portfolio_prices.multiply([shares[t] for t in portfolio_prices.columns],
-                                                                axis=1).sum(axis=1)
-                    portfolio_value = portfolio_value.dropna()
-                    portfolio_value = portfolio_value[portfolio_value > 0]
-
-                    sp500 = yf.download("^GSPC", start=start_date, auto_adjust=True, progress=False)['Close'].ffill().bfill()
+                    sp500 = sp500_future.result()['Close'].ffill().bfill()
 
                     if portfolio_value.empty or pd.isna(portfolio_value.iloc[0]) or portfolio_value.iloc[0] == 0:
                         st.warning(
                             "Portfolio price data incomplete or zero on first day; cannot display performance graph.")
                     else:
-                        portfolio_norm = portfolio_value / portfolio_value.iloc[0] * 100
-                        sp500_norm = sp500 / sp500.iloc[0] * 100
-
-                        comparison_df = pd.DataFrame({
-                            "Date": portfolio_norm.index,
-                            "Portfolio": pd.Series(portfolio_norm.values.ravel(), index=portfolio_norm.index),
-                            "S&P 500": pd.Series(sp500_norm.values.ravel(), index=sp500_norm.index)
-                        })
+                        comparison_df = normalized_comparison(portfolio_value, sp500)
 
-                        fig = px.line(comparison_df, x="Date", y=["Portfolio", "S&P 500"],
+                        fig = px.line(downsample_frame(comparison_df, "Date", ["Portfolio", "S&P 500"]), x="Date", y=["Portfolio", "S&P 500"],
                                       labels={"value": "Normalized Value"},
                                       title=f"Portfolio vs S&P 500 ({time_choice})")
                         st.plotly_chart(fig)
@@ -416,34 +312,28 @@ def show_port_manager():
                     st.warning('No Portfolio Data; cannot display performance graph.')
 
                 st.subheader('Portfolio Allocation by Sector')
-                sector_totals = defaultdict(float)
 
                 if not df.empty:
-                    for _, row in df.iterrows():
-                        ticker = row['Ticker']
-                        value = row['Total Value ($)']
-
-                        sector_response = supabase.table("ticker_info").select("sector").eq("ticker", ticker).execute()
-                        if sector_response.data:
-                            sector = sector_response.data[0]['sector']
-                        else:
-                            sector = yf.Ticker(ticker).info.get('sector', 'N/A')
-                            supabase.table("ticker_info").insert({
-                                "ticker": ticker,
-                                "sector": sector
-                            }).execute()
-
-                        sector_totals[sector] += value
-
-                    sector_df = pd.DataFrame(list(sector_totals.items()), columns=['Sector', 'Value'])
+                    sectors = {row['ticker']: row['sector'] for row in sectors_future.result().data}
+                    missing = {t: submit(market_data.ticker_info, t) for t in tickers if t not in sectors}
+                    if missing:
+                        for ticker, future in missing.items():
+                            sectors[ticker] = future.result().get('sector', 'N/A')
+                        execute(supabase.table("ticker_info").insert([
+                            {"ticker": ticker, "sector": sectors[ticker]} for ticker in missing
+                        ]))
+
+                    sector_df = sector_allocation(df.set_index('Ticker')['Total Value ($)'].to_dict(), sectors)
                     if not sector_df.empty:
                         fig2 = px.pie(sector_df, values='Value', names='Sector', color='Sector', color_discrete_sequence=px.colors.qualitative.Plotly, title='Sector Allocation')
                         st.plotly_chart(fig2)
 
                 if 'comparison_df' in locals() and 'sector_df' in locals():
+                    with span('compute.portfolio_pdf', tickers=df['Ticker']):
+                        pdf = generate_portfolio_pdf(df, port_summary, comparison_df, sector_df)
                     st.download_button(
                         label="Download Portfolio PDF",
-                        data=generate_portfolio_pdf(df, port_summary, comparison_df, sector_df),
+                        data=pdf,
                         file_name="portfolio_summary.pdf",
                         mime="application/pdf"
                     )
@@ -461,7 +351,7 @@ def show_port_manager():
         st.title('📜Transaction History')
 
         try:
-            response = (supabase.table('user_transactions').select('id',
+            response = (execute(supabase.table('user_transactions').select('id',
                                                                    'txn_date',
                                                                    'txn_type',
                                                                    'ticker_symbol',
@@ -469,7 +359,7 @@ def show_port_manager():
                                                                    'price_per_share',
                                                                    'total_value',
                                                                    'notes'
-                                                                   ).eq('user_id', stored_id).execute())
+                                                                   ).eq('user_id', stored_id)))
             rows = response.data
 
             if not rows:
@@ -534,7 +424,9 @@ def show_port_manager():
 
                     txn_id = txn_to_delete.split()[1]
                     try:
-                        supabase.table('user_transactions').delete().eq('id', txn_id).execute()
+                        execute(supabase.table('user_transactions').delete().eq('id', txn_id))
+                        invalidate_lot_books(stored_id)
+                        invalidate_holdings(stored_id)
                         st.success(f"Transaction {txn_id} deleted successfully.")
                         st.rerun()
                     except Exception as e:
@@ -545,6 +437,104 @@ def show_port_manager():
 
 
 
+    def render_var_chart(bins, VaR, days):
+        edges = np.array(bins['edges'])
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=bins['counts'],
+            width=np.diff(edges),
+            name='Portfolio Returns',
+            opacity=0.75
+        ))
+        fig.add_vline(
+            x=-float(VaR),
+            line=dict(color='red', width=2, dash='dash'),
+            annotation_text=f"VaR: ${VaR:,.2f}",
+            annotation_position="top right"
+        )
+        fig.update_layout(
+            title=f"{days}-Day Portfolio Returns Distribution",
+            xaxis_title="Portfolio Returns ($)",
+            yaxis_title="Frequency",
+            bargap=0.1,
+            template="plotly_white"
+        )
+
+        st.plotly_chart(fig, use_container_width=True)
+
+    def load_price_panel(tickers):
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=10 * 365)
+        close_df = pd.DataFrame()
+        data = market_data.download(tickers, start=start_date, end=end_date, auto_adjust=True, progress=False)
+        close_df[tickers] = data['Close']
+        for ticker in close_df:
+            if close_df[ticker].isna().all():
+                retry_prices = retry_if_fail(ticker, start_date=start_date, end_date=end_date)
+                close_df[ticker] = retry_prices
+        return PricePanel.from_frame(close_df) if not close_df.empty else None
+
+    def render_var_breakdown(tickers, returns, weights, VaR, portfolio_value, days):
+        st.subheader('VaR Breakdown by Holding')
+        with span('compute.var_decomposition', tickers=tickers):
+            breakdown = var_decomposition(returns, weights, tickers, VaR, portfolio_value, days)
+            correlations = correlation_matrix(returns, tickers)
+        breakdown = breakdown.sort_values('component_var', ascending=False)
+
+        st.dataframe(pd.DataFrame({
+            'Ticker': breakdown.index,
+            'Weight': breakdown['weight'].map('{:.2%}'.format),
+            'Beta to Portfolio': breakdown['beta'].map('{:.2f}'.format),
+            'Marginal VaR (per $1)': breakdown['marginal_var'].map('{:.4f}'.format),
+            'Component VaR ($)': breakdown['component_var'].map('${:,.2f}'.format),
+            'Share of VaR': breakdown['contribution'].map('{:.2%}'.format),
+        }), hide_index=True)
+        st.caption(f'Component VaR is weight x beta of each holding\'s {days}-day returns to the portfolio\'s, '
+                   'so the components add up to the headline VaR.')
+
+        fig = px.imshow(correlations, zmin=-1, zmax=1, color_continuous_scale='RdBu_r', aspect='auto',
+                        title='Daily Return Correlations')
+        st.plotly_chart(fig, use_container_width=True)
+
+    def stress_test_section(position_values):
+        st.subheader('Stress Tests')
+        st.caption('Replays historical drawdowns against current holdings. Holdings without history for a window, '
+                   'and market-wide custom shocks, use each holding\'s 3-year beta to the S&P 500.')
+        custom = st.data_editor(
+            pd.DataFrame({'Scenario': ['Market -10%', 'Market -25%'],
+                          'Market Shock (%)': [-10.0, -25.0],
+                          'Overrides': ['', '']}),
+            num_rows='dynamic', hide_index=True, key='stress_custom',
+            column_config={'Overrides': st.column_config.TextColumn(help='Per-ticker shocks, e.g. AAPL:-30, TSLA:-50')},
+        )
+        try:
+            shocks = [(row['Scenario'] or f'Custom {i + 1}',
+                       float(row['Market Shock (%)']) / 100 if pd.notna(row['Market Shock (%)']) else 0.0,
+                       parse_overrides(row['Overrides']))
+                      for i, row in custom.iterrows()]
+        except ValueError as e:
+            st.warning(str(e))
+            return
+
+        tickers = position_values.index.tolist()
+        prices = market_data.download(tickers + [BENCHMARK], start=HISTORY_START, auto_adjust=True, progress=False)['Close']
+        with span('compute.stress_test', tickers=tickers):
+            table, contributions = stress_test(prices, position_values, shocks=shocks)
+
+        st.dataframe(table.style.format({
+            'S&P 500 Return (%)': '{:,.2f}%',
+            'Portfolio Return (%)': '{:,.2f}%',
+            'P&L ($)': '${:,.2f}',
+        }, na_rep='n/a'), hide_index=True)
+
+        scenario = st.selectbox('Holding P&L for scenario', range(len(table)),
+                                format_func=lambda i: table['Scenario'].iloc[i], key='stress_scenario')
+        by_holding = contributions.iloc[scenario].sort_values()
+        fig = px.bar(x=by_holding.index, y=by_holding.values, labels={'x': 'Ticker', 'y': 'P&L ($)'},
+                     title=f"P&L by Holding: {table['Scenario'].iloc[scenario]}")
+        st.plotly_chart(fig, use_container_width=True)
+
     def portfolio_risk():
         stored_id = st.session_state.get("user_id")
         if not stored_id:
@@ -554,79 +544,70 @@ def show_port_manager():
         st.title("📉 Portfolio Risk Analysis (Historical VaR)")
 
         try:
-            response = supabase.table('user_portfolio').select('ticker_symbol', 'share_count').eq('user_id',
-                                                                                                  stored_id).execute()
-            rows = response.data
+            holdings = holdings_snapshot(stored_id)
 
-            if not rows:
+            if holdings.empty:
                 st.warning("No portfolio data found for risk analysis.")
                 return
 
-            df = pd.DataFrame(rows)
-            tickers = df['ticker_symbol'].tolist()
-            shares_dict = df.set_index('ticker_symbol')['share_count'].astype(float).to_dict()
-
-            latest_prices = yf.download(tickers=tickers, period='5d', interval='5m', auto_adjust=True, progress=False)['Close'].ffill().bfill().iloc[-1]
-            failures = latest_prices[latest_prices.isna()].index.tolist()
-            for ticker in failures:
-                retry_price = retry_if_fail(ticker, start_date=datetime.now() - timedelta(days=10), end_date=datetime.now())
-                latest_prices[ticker] = retry_price.iloc[-1] if not retry_price.empty else np.nan
-
-            portfolio_value = sum(latest_prices[t] * shares_dict[t] for t in tickers)
-
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=10 * 365)
-            close_df = pd.DataFrame()
-            data = yf.download(tickers, start=start_date, end=end_date, auto_adjust=True, progress=False)
-            close_df[tickers] = data['Close']
-            for ticker in close_df:
-                if close_df[ticker].isna().all():
-                    retry_prices = retry_if_fail(ticker, start_date=start_date, end_date=end_date)
-                    close_df[ticker] = retry_prices
-
-            if close_df.empty:
-                st.warning("Failed to fetch historical price data for selected tickers.")
+            tickers = holdings.tickers
+            shares_dict = holdings.shares_dict()
+
+            days = st.number_input('Days', value=5, min_value=1, max_value=10, step=1)
+            confidence = st.slider('Confidence', min_value=70.0, max_value=99.99, value=95.0, step=0.1)
+            method = st.radio('Method', ['Historical', 'Parametric (EWMA)', 'Parametric (Factor Model)'], horizontal=True)
+
+            if method != 'Historical':
+                model = ewma_covariance(tickers) if method == 'Parametric (EWMA)' else factor_model(tickers)
+                position_values = pd.Series({t: shares_dict[t] * p for t, p in zip(model.tickers, model.last_prices)})
+                portfolio_value = position_values.sum()
+                weights = position_values.to_numpy() / portfolio_value
+                VaR = parametric_var(model.volatility(weights, days), portfolio_value, confidence)
+                st.metric(label=f"{days}-Day {method} VaR at {confidence}% Confidence", value=f"${VaR:,.2f}")
+                if method == 'Parametric (EWMA)':
+                    st.caption(f"Exponentially weighted covariance (decay {model.decay}) as of the "
+                               f"{model.last_date:%Y-%m-%d} close; daily portfolio volatility {model.volatility(weights):.2%}.")
+                else:
+                    st.caption(f"{model.n_factors}-factor statistical model fit on 3 years of returns to the "
+                               f"{model.last_date:%Y-%m-%d} close; factors explain {model.explained_variance():.0%} "
+                               f"of total variance; daily portfolio volatility {model.volatility(weights):.2%}.")
+                stress_test_section(position_values)
                 return
 
-            log_returns = np.log(close_df / close_df.shift(1)).dropna()
+            snapshot = holdings.nightly
+            if (snapshot and snapshot['var_value'] is not None and snapshot['var_days'] == days
+                    and snapshot['var_confidence'] == confidence):
+                VaR = snapshot['var_value']
+                st.metric(label=f"{days}-Day Historical VaR at {confidence}% Confidence", value=f"${VaR:,.2f}")
+                st.caption(f"From the nightly snapshot computed at {snapshot['computed_at'][:16].replace('T', ' ')} UTC")
+                render_var_chart(snapshot['var_histogram'], VaR, days)
+                if st.checkbox('Show per-holding VaR breakdown and correlations'):
+                    panel = load_price_panel(tickers)
+                    if panel is not None:
+                        values = {h['ticker']: h['shares'] * h['price'] for h in snapshot['holdings']}
+                        weights = np.array([values[t] for t in tickers]) / snapshot['stock_value']
+                        render_var_breakdown(tickers, panel.log_returns(), weights, VaR, snapshot['stock_value'], days)
+                stress_test_section(pd.Series({h['ticker']: h['shares'] * h['price'] for h in snapshot['holdings']}))
+                return
 
-            weights = np.array([shares_dict[t] * close_df[t].iloc[-1] / portfolio_value for t in tickers])
+            portfolio_value = holdings.stock_value
 
-            portfolio_returns = (log_returns * weights).sum(axis=1)
+            panel = load_price_panel(tickers)
+            if panel is None:
+                st.warning("Failed to fetch historical price data for selected tickers.")
+                return
 
-            days = st.number_input('Days', value=5, min_value=1, max_value=10, step=1)
-            confidence = st.slider('Confidence', min_value=70.0, max_value=99.99, value=95.0, step=0.1)
+            weights = position_weights(shares_dict, dict(zip(panel.tickers, panel.values[-1])), portfolio_value)
 
-            range_returns = portfolio_returns.rolling(window=days).sum().dropna()
-            range_returns_pct = np.exp(range_returns) - 1
-            range_returns_dollar = range_returns_pct * portfolio_value
-            VaR = -np.percentile(range_returns_dollar, 100 - confidence)
+            with span('compute.historical_var', tickers=tickers):
+                returns = panel.log_returns()
+                VaR, range_returns_dollar = historical_var_from_returns(returns, weights, portfolio_value, days, confidence)
 
             st.metric(label=f"{days}-Day Historical VaR at {confidence}% Confidence", value=f"${VaR:,.2f}")
 
-            fig = go.Figure()
-            fig.add_trace(go.Histogram(
-                x=range_returns_dollar,
-                nbinsx=50,
-                name='Portfolio Returns',
-                opacity=0.75
-            ))
-
-            fig.add_vline(
-                x=-float(VaR),
-                line=dict(color='red', width=2, dash='dash'),
-                annotation_text=f"VaR: ${VaR:,.2f}",
-                annotation_position="top right"
-            )
-            fig.update_layout(
-                title=f"{days}-Day Portfolio Returns Distribution",
-                xaxis_title="Portfolio Returns ($)",
-                yaxis_title="Frequency",
-                bargap=0.1,
-                template="plotly_white"
-            )
-
-            st.plotly_chart(fig, use_container_width=True)
+            render_var_chart(return_histogram(range_returns_dollar), VaR, days)
+            render_var_breakdown(tickers, returns, weights, VaR, portfolio_value, days)
+            stress_test_section(holdings.position_values())
 
         except Exception as e:
             st.error(f"Error computing portfolio risk: {e}")
@@ -1,10 +1,17 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta, timezone
-import yfinance as yf
 import requests
 from groq import Groq
 from supabase import Client, create_client
+from services import market_data
+from analytics.alerts import KINDS, MOVE
+from analytics.charts import downsample_series
+from analytics.watchlist import watchlist_changes
+from services.concurrency import submit
+from services.market_cache import ttl_seconds
+from services.symbols import invalid_ticker_message, validate_ticker
+from services.tracing import execute, span
 supabase_url = st.secrets["SUPABASE_URL"]
 supabase_key = st.secrets["SUPABASE_KEY"]
 supabase: Client = create_client(supabase_url, supabase_key)
@@ -15,23 +22,38 @@ groq_key = st.secrets['API_KEY']
 
 groq_client = Groq(api_key=groq_key)
 
+FAILED_ROW_TTL = 60
+
+
+def ticker_metrics(info):
+    metrics = {
+        'Current Price': info.get('regularMarketPrice'),
+        'Previous Close': info.get('previousClose'),
+        'Open': info.get('open'),
+        'Days Low': info.get('dayLow'),
+        'Days High': info.get('dayHigh'),
+        'Fifty Two Week Low': info.get('fiftyTwoWeekLow'),
+        'Fifty Two Week High': info.get('fiftyTwoWeekHigh'),
+        'Volume': info.get('volume'),
+        'Average Volume': info.get('averageVolume'),
+        'Market Cap': info.get('marketCap'),
+        'Beta': info.get('beta'),
+        'PE Ratio': info.get('trailingPE'),
+        'EPS': info.get('trailingEps'),
+        'Target Price': info.get('targetMeanPrice'),
+    }
+
+    def format_value(val):
+        if val is None:
+            return 'N/A'
+        if isinstance(val, (int, float)):
+            return f"{val:,.2f}"
+        if isinstance(val, datetime):
+            return val.strftime('%b %d, %Y')
+        return str(val)
+
+    return {k: format_value(v) for k, v in metrics.items()}
 
-def get_price_on_or_before(hist, date):
-    if hist.empty:
-        return None
-    date_str = date.strftime("%Y-%m-%d")
-    if date_str in hist.index:
-        return hist.loc[date_str]["Close"]
-    hist_dates = pd.to_datetime([d.split()[0] for d in hist.index.astype(str)])
-    target_date = pd.to_datetime(date_str)
-    if target_date < hist_dates.min():
-        first_date = hist_dates.min().strftime("%Y-%m-%d")
-        return hist.loc[first_date]["Close"]
-    valid_dates = hist_dates[hist_dates <= target_date]
-    if len(valid_dates) > 0:
-        closest_date = valid_dates.max().strftime("%Y-%m-%d")
-        return hist.loc[closest_date]["Close"]
-    return None
 
 def show_research_watchlist_page():
 
@@ -57,69 +79,32 @@ def show_research_watchlist_page():
                 st.warning("Please enter a ticker symbol")
             else:
                 notes = 'N/A'
-                if not yf.Ticker(ticker).info.get('regularMarketPrice'):
-                    st.warning('Invalid ticker symbol')
+                if not validate_ticker(ticker):
+                    st.warning(invalid_ticker_message(ticker))
                 else:
-                    response = supabase.table('user_watchlist').select('ticker_symbol').eq('user_id', stored_id).eq(
-                        'ticker_symbol', ticker).execute()
+                    response = execute(supabase.table('user_watchlist').select('ticker_symbol').eq('user_id', stored_id).eq(
+                        'ticker_symbol', ticker))
                     if response.data:
                         st.warning(f'{ticker} already exists in your watchlist')
                     else:
-                        supabase.table("user_watchlist").insert({
+                        execute(supabase.table("user_watchlist").insert({
                             "user_id": stored_id,
                             "ticker_symbol": ticker,
                             "notes": notes
-                        }).execute()
+                        }))
                         st.success(f"{ticker} has been added to your watchlist")
 
 
-        if 'metrics_df' not in st.session_state:
-            st.session_state.metrics_df = pd.DataFrame()
-        if 'ticker_prices_df' not in st.session_state:
-            st.session_state.ticker_prices_df = pd.DataFrame()
-
         if submitted and ticker:
 
             st.session_state['ticker'] = ticker
 
-            yf_ticker = yf.Ticker(ticker)
-            hist = yf_ticker.history(period="7d")
+            hist = market_data.ticker_history(ticker, period="7d")
             if hist.empty:
                 st.warning(f'Could not fetch price data for specified ticker')
-            else:
-                st.session_state.ticker_prices_df = hist[['Close']].copy()
-
-                info = yf_ticker.info
-                metrics = {
-                    'Current Price': info.get('regularMarketPrice'),
-                    'Previous Close': info.get('previousClose'),
-                    'Open': info.get('open'),
-                    'Days Low': info.get('dayLow'),
-                    'Days High': info.get('dayHigh'),
-                    'Fifty Two Week Low': info.get('fiftyTwoWeekLow'),
-                    'Fifty Two Week High': info.get('fiftyTwoWeekHigh'),
-                    'Volume': info.get('volume'),
-                    'Average Volume': info.get('averageVolume'),
-                    'Market Cap': info.get('marketCap'),
-                    'Beta': info.get('beta'),
-                    'PE Ratio': info.get('trailingPE'),
-                    'EPS': info.get('trailingEps'),
-                    'Target Price': info.get('targetMeanPrice'),
-                }
-
-                def format_value(val):
-                    if val is None:
-                        return 'N/A'
-                    if isinstance(val, (int, float)):
-                        return f"{val:,.2f}"
-                    if isinstance(val, datetime):
-                        return val.strftime('%b %d, %Y')
-                    return str(val)
-
-                metrics_formatted = {k: format_value(v) for k, v in metrics.items()}
-                st.session_state.metrics_df = pd.DataFrame([metrics_formatted])
-
-        if 'ticker' in st.session_state and yf.Ticker(st.session_state['ticker']).info.get('regularMarketPrice'):
+
+        stored_info = market_data.ticker_info(st.session_state['ticker']) if 'ticker' in st.session_state else {}
+        if stored_info.get('regularMarketPrice'):
             time_options = {
                 "1 Month": 30,
                 "3 Months": 90,
@@ -133,24 +118,17 @@ def show_research_watchlist_page():
             days = time_options[time_choice]
             start_date = datetime.today() - timedelta(days=days)
 
-            ticker_prices = yf.download(st.session_state['ticker'], start=start_date, auto_adjust=True)['Close'].ffill()
-
-            st.session_state.ticker_prices_df = pd.DataFrame(
-                {'Date': ticker_prices.index.ravel(), 'Close': ticker_prices.values.ravel()})
+            ticker_prices = market_data.download(st.session_state['ticker'], start=start_date, auto_adjust=True)['Close'].ffill()
 
-            if not st.session_state.ticker_prices_df.empty:
-                df = st.session_state.ticker_prices_df.set_index('Date')
-                st.line_chart(df['Close'])
+            if not ticker_prices.empty:
+                st.line_chart(downsample_series(pd.Series(ticker_prices.values.ravel(), index=ticker_prices.index, name='Close')))
 
-            if not st.session_state.metrics_df.empty:
-                st.subheader('Important Metrics')
-                metrics_dict = st.session_state.metrics_df.iloc[0].to_dict()
+            st.subheader('Important Metrics')
+            formatted_lines = []
+            for key, value in ticker_metrics(stored_info).items():
+                formatted_lines.append(f"**{key}** {'.' * 20} <span style='color: #00cc44;'>{value}</span>")
 
-                formatted_lines = []
-                for key, value in metrics_dict.items():
-                    formatted_lines.append(f"**{key}** {'.' * 20} <span style='color: #00cc44;'>{value}</span>")
-
-                st.markdown('<br>'.join(formatted_lines), unsafe_allow_html=True)
+            st.markdown('<br>'.join(formatted_lines), unsafe_allow_html=True)
 
             if 'show_news' not in st.session_state:
                 st.session_state.show_news = False
@@ -161,12 +139,12 @@ def show_research_watchlist_page():
             col1, col2 = st.columns(2)
 
             with col1:
-                if st.button(f'{stored_ticker} News') and yf.Ticker(stored_ticker).info.get('regularMarketPrice'):
+                if st.button(f'{stored_ticker} News') and market_data.ticker_info(stored_ticker).get('regularMarketPrice'):
                     st.session_state.show_news = True
                     st.session_state.show_ai = False
 
             with col2:
-                if st.button(f'{stored_ticker} AI Overview') and yf.Ticker(stored_ticker).info.get('regularMarketPrice'):
+                if st.button(f'{stored_ticker} AI Overview') and market_data.ticker_info(stored_ticker).get('regularMarketPrice'):
                     st.session_state.show_ai = True
                     st.session_state.show_news = False
 
@@ -178,7 +156,8 @@ def show_research_watchlist_page():
                         two_months_ago = (datetime.now() - timedelta(days=60)).strftime('%Y-%m-%d')
                         today = datetime.now().strftime('%Y-%m-%d')
                         url = f"https://finnhub.io/api/v1/company-news?symbol={stored_ticker}&from={two_months_ago}&to={today}&token={API_KEY}"
-                        response = requests.get(url)
+                        with span('finnhub.company_news', tickers=[stored_ticker]) as s:
+                            response = s.measure(requests.get(url))
                         news_data = response.json()
                         if response.status_code == 200:
                             with st.container():
@@ -205,8 +184,7 @@ def show_research_watchlist_page():
                     if stored_ticker == '':
                         st.warning('Please enter a ticker symbol')
                     else:
-                        yf_ticker = yf.Ticker(stored_ticker)
-                        info = yf_ticker.info
+                        info = market_data.ticker_info(stored_ticker)
 
 
                         prompt = f"""
@@ -226,11 +204,12 @@ def show_research_watchlist_page():
 
                         try:
                             # noinspection PyTypeChecker
-                            response = groq_client.chat.completions.create(
-                                model="llama-3.1-8b-instant",
-                                messages=[
-                                    {"role": "system",
-                                     "content": """You are a financial analyst. When given stock data, provide a clear, detailed, and professional summary of the company's financial condition and investment analysis.
+                            with span('groq.chat', tickers=[stored_ticker]):
+                                response = groq_client.chat.completions.create(
+                                    model="llama-3.1-8b-instant",
+                                    messages=[
+                                        {"role": "system",
+                                         "content": """You are a financial analyst. When given stock data, provide a clear, detailed, and professional summary of the company's financial condition and investment analysis.
     
                         Instructions for your analysis:
                         1. **Company Overview** — Briefly describe what the company does
@@ -244,10 +223,10 @@ def show_research_watchlist_page():
     
                         Keep your tone objective and data driven.
                         CRITICAL FORMATTING: Write each word separately. For example, write "the company is profitable" NOT "thecompanyisprofitable". Always put spaces between words."""},
-                                    {"role": "user", "content": prompt}
-                                ],
-                                temperature=0.0
-                            )
+                                        {"role": "user", "content": prompt}
+                                    ],
+                                    temperature=0.0
+                                )
                             analysis = response.choices[0].message.content.strip()
 
                             st.subheader('**🤖 AI Analysis**')
@@ -258,6 +237,20 @@ def show_research_watchlist_page():
                     st.warning(f"AI request failed: {e}")
 
 
+    def watchlist_row(ticker, today):
+        one_month_ago = today - timedelta(days=30)
+        three_months_ago = today - timedelta(days=90)
+        six_months_ago = today - timedelta(days=182)
+        try:
+            hist = market_data.ticker_history(ticker, start=six_months_ago.strftime("%Y-%m-%d"),
+                                              end=today.strftime("%Y-%m-%d"))
+            info = market_data.ticker_info(ticker)
+            with span('compute.watchlist_changes', tickers=[ticker]):
+                return watchlist_changes(hist, info.get("regularMarketPrice"), info.get("previousClose"),
+                                         one_month_ago, three_months_ago, six_months_ago)
+        except Exception:
+            return None
+
     def show_watchlist():
         stored_id = st.session_state.get("user_id")
         if not stored_id:
@@ -266,9 +259,22 @@ def show_research_watchlist_page():
 
         st.title("🔍Your Watchlist")
 
+        triggered = execute(supabase.table('triggered_alerts').select('id, ticker_symbol, kind, threshold, observed, triggered_at')
+                            .eq('user_id', stored_id).eq('dismissed', False).order('triggered_at', desc=True))
+        if triggered.data:
+            for alert in triggered.data:
+                unit = '%' if alert['kind'] == MOVE else ''
+                st.warning(f"🔔 {alert['ticker_symbol']}: {alert['kind']} {alert['threshold']:,.2f}{unit} "
+                           f"(observed {alert['observed']:,.2f}{unit} at {alert['triggered_at'][:16].replace('T', ' ')} UTC)")
+            if st.button('Dismiss Alerts'):
+                execute(supabase.table('triggered_alerts').update({'dismissed': True})
+                        .in_('id', [alert['id'] for alert in triggered.data]))
+                st.rerun()
+
         col1, col2 = st.columns([1, 4])
         with col1:
             if st.button("🔄 Refresh All Data"):
+                market_data.invalidate_tickers(st.session_state.pop('watchlist_rows', {}))
                 st.rerun()
 
         with st.form(key="watchlist_form", clear_on_submit=True):
@@ -283,19 +289,19 @@ def show_research_watchlist_page():
                 else:
                     if not notes:
                         notes = "N/A"
-                    if not yf.Ticker(ticker).info.get('regularMarketPrice'):
-                        st.warning('Invalid ticker symbol')
+                    if not validate_ticker(ticker):
+                        st.warning(invalid_ticker_message(ticker))
                     else:
-                        response = supabase.table('user_watchlist').select('ticker_symbol').eq('user_id', stored_id).eq(
-                            'ticker_symbol', ticker).execute()
+                        response = execute(supabase.table('user_watchlist').select('ticker_symbol').eq('user_id', stored_id).eq(
+                            'ticker_symbol', ticker))
                         if response.data:
                             st.warning(f'{ticker} already exists in your watchlist')
                         else:
-                            supabase.table("user_watchlist").insert({
+                            execute(supabase.table("user_watchlist").insert({
                                 "user_id": stored_id,
                                 "ticker_symbol": ticker,
                                 "notes": notes
-                            }).execute()
+                            }))
                             st.success(f"{ticker} has been added to your watchlist")
                             st.rerun()
 
@@ -303,62 +309,73 @@ def show_research_watchlist_page():
                 if ticker == "":
                     st.warning("Please enter a ticker symbol")
                 else:
-                    response = supabase.table('user_watchlist').select('ticker_symbol').eq('user_id', stored_id).eq(
-                        'ticker_symbol', ticker).execute()
+                    response = execute(supabase.table('user_watchlist').select('ticker_symbol').eq('user_id', stored_id).eq(
+                        'ticker_symbol', ticker))
                     if not response.data:
                         st.warning(f'{ticker} does not exist in your watchlist')
                     else:
-                        supabase.table("user_watchlist").delete().eq("user_id", stored_id).eq("ticker_symbol",
-                                                                                              ticker).execute()
+                        execute(supabase.table("user_watchlist").delete().eq("user_id", stored_id).eq("ticker_symbol",
+                                                                                              ticker))
                         st.success(f"{ticker} removed from your watchlist")
                         st.rerun()
 
-        response = supabase.table("user_watchlist").select("ticker_symbol, notes").eq("user_id", stored_id).execute()
+        response = execute(supabase.table("user_watchlist").select("ticker_symbol, notes").eq("user_id", stored_id))
         if response.data:
             df = pd.DataFrame(response.data)
-            updated_rows = []
             today = datetime.now(timezone.utc)
-            one_month_ago = today - timedelta(days=30)
-            three_months_ago = today - timedelta(days=90)
-            six_months_ago = today - timedelta(days=182)
-
-            for _, row in df.iterrows():
-                ticker = row["ticker_symbol"]
-                notes = row["notes"]
-                try:
-                    ticker_yf = yf.Ticker(ticker)
-                    hist = ticker_yf.history(start=six_months_ago.strftime("%Y-%m-%d"), end=today.strftime("%Y-%m-%d"))
-                    price_1m = get_price_on_or_before(hist, one_month_ago)
-                    price_3m = get_price_on_or_before(hist, three_months_ago)
-                    price_6m = get_price_on_or_before(hist, six_months_ago)
-                    share_price = ticker_yf.info.get("regularMarketPrice")
-                    last_close = ticker_yf.info.get("previousClose")
-
-                    if any(v is None for v in [price_1m, price_3m, price_6m, share_price, last_close]):
-                        continue
-
-                    day_change = share_price - last_close
-                    month_change = share_price - price_1m
-                    threeM_change = share_price - price_3m
-                    sixM_change = share_price - price_6m
-                    day_pct = (day_change / last_close) * 100 if last_close else None
-                    month_pct = (month_change / price_1m) * 100 if price_1m else None
-                    threeM_pct = (threeM_change / price_3m) * 100 if price_3m else None
-                    sixM_pct = (sixM_change / price_6m) * 100 if price_6m else None
-
-                    updated_rows.append([
-                        ticker, notes, share_price, price_1m, price_3m, price_6m,
-                        day_pct, month_pct, threeM_pct, sixM_pct
-                    ])
-                except Exception:
-                    continue
-
+            row_cache = st.session_state.setdefault('watchlist_rows', {})
+            for ticker in set(row_cache) - set(df['ticker_symbol']):
+                del row_cache[ticker]
+
+            stale = [t for t in df['ticker_symbol'] if t not in row_cache or row_cache[t][0] <= today]
+            futures = {t: submit(watchlist_row, t, today) for t in stale}
+            for ticker, future in futures.items():
+                row = future.result()
+                ttl = ttl_seconds('quote', today) if row is not None else FAILED_ROW_TTL
+                row_cache[ticker] = (today + timedelta(seconds=ttl), row)
+
+            updated_rows = [[row["ticker_symbol"], row["notes"]] + row_cache[row["ticker_symbol"]][1]
+                            for _, row in df.iterrows() if row_cache[row["ticker_symbol"]][1] is not None]
             display_df = pd.DataFrame(updated_rows, columns=[
                 "Ticker", "Notes", "Price Now", "Price 1M Ago", "Price 3M Ago", "Price 6M Ago",
                 "Day % Change", "1M % Change", "3M % Change", "6M % Change"
             ])
             display_df = display_df.fillna("N/A")
             st.dataframe(display_df, hide_index=True)
+
+            st.subheader('Price Alerts')
+            with st.form(key='alert_form', clear_on_submit=True):
+                alert_ticker = st.selectbox('Ticker', df['ticker_symbol'].tolist())
+                kind = st.selectbox('Condition', KINDS)
+                threshold = st.number_input('Threshold ($ price, or % move from previous close)', min_value=0.0,
+                                            step=1.0)
+                if st.form_submit_button('Create Alert'):
+                    if threshold <= 0:
+                        st.warning('Please enter a threshold above zero')
+                    else:
+                        execute(supabase.table('watchlist_alerts').insert({
+                            'user_id': stored_id,
+                            'ticker_symbol': alert_ticker,
+                            'kind': kind,
+                            'threshold': threshold,
+                        }))
+                        st.success(f'Alert created for {alert_ticker}')
+                        st.rerun()
+
+            alerts = execute(supabase.table('watchlist_alerts').select('id, ticker_symbol, kind, threshold')
+                             .eq('user_id', stored_id).eq('active', True).order('ticker_symbol'))
+            if alerts.data:
+                alerts_df = pd.DataFrame(alerts.data).rename(columns={
+                    'ticker_symbol': 'Ticker', 'kind': 'Condition', 'threshold': 'Threshold'})
+                st.dataframe(alerts_df.drop(columns='id'), hide_index=True)
+                alert_to_remove = st.selectbox('Select an alert to remove:', alerts_df['id'].tolist(),
+                                               format_func=lambda i: ' | '.join(
+                                                   str(v) for v in alerts_df.set_index('id').loc[i]))
+                if st.button('Remove Alert'):
+                    execute(supabase.table('watchlist_alerts').delete().eq('id', alert_to_remove))
+                    st.rerun()
+            else:
+                st.info('No active alerts. Alerts are checked every minute while the market is open.')
         else:
             st.info("No tickers in your watchlist yet.")
 
@@ -0,0 +1,88 @@
+import argparse
+import io
+import sys
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import requests
+import streamlit as st
+from supabase import Client, create_client
+
+supabase_url = st.secrets["SUPABASE_URL"]
+supabase_key = st.secrets["SUPABASE_KEY"]
+supabase: Client = create_client(supabase_url, supabase_key)
+
+PAGE_SIZE = 1000
+UPSERT_BATCH = 500
+SYMBOL_TABLE = 'symbol_directory'
+NASDAQ_LISTED = 'https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt'
+OTHER_LISTED = 'https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt'
+EXCHANGES = {'A': 'NYSE American', 'N': 'NYSE', 'P': 'NYSE Arca', 'Z': 'Cboe BZX', 'V': 'IEX'}
+
+
+def fetch_all(table, columns, order):
+    rows, start = [], 0
+    while True:
+        query = supabase.table(table).select(columns)
+        for column in order:
+            query = query.order(column)
+        batch = query.range(start, start + PAGE_SIZE - 1).execute().data or []
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def read_listing(url):
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    listing = pd.read_csv(io.StringIO(response.text), sep='|', dtype=str, keep_default_na=False)
+    return listing[~listing.iloc[:, 0].str.startswith('File Creation Time')]
+
+
+def listed_symbols():
+    nasdaq = read_listing(NASDAQ_LISTED)
+    nasdaq = nasdaq[nasdaq['Test Issue'] == 'N']
+    other = read_listing(OTHER_LISTED)
+    other = other[other['Test Issue'] == 'N']
+    symbols = pd.concat([
+        pd.DataFrame({'ticker': nasdaq['Symbol'], 'name': nasdaq['Security Name'], 'exchange': 'NASDAQ'}),
+        pd.DataFrame({'ticker': other['ACT Symbol'], 'name': other['Security Name'],
+                      'exchange': other['Exchange'].map(EXCHANGES).fillna(other['Exchange'])}),
+    ])
+    symbols = symbols[~symbols['ticker'].str.contains(r'[$^]', regex=True) & (symbols['ticker'] != '')]
+    symbols['ticker'] = symbols['ticker'].str.replace('.', '-', regex=False)
+    return symbols.drop_duplicates('ticker')
+
+
+def run(dry_run=False):
+    started = time.perf_counter()
+    symbols = listed_symbols()
+    sectors = {row['ticker']: row['sector'] for row in fetch_all(SYMBOL_TABLE, 'ticker, sector', ('ticker',)) if row['sector']}
+    sectors.update({row['ticker']: row['sector'] for row in fetch_all('ticker_info', 'ticker, sector', ('ticker',))
+                    if row['sector'] and row['sector'] != 'N/A'})
+    symbols['sector'] = symbols['ticker'].map(sectors)
+    symbols['valid'] = True
+    symbols['updated_at'] = datetime.now(timezone.utc).isoformat()
+    rows = symbols.astype(object).where(symbols.notna(), None).to_dict('records')
+    print(f'{len(rows)} listed symbols, {symbols["sector"].notna().sum()} with a known sector')
+
+    if not dry_run:
+        for i in range(0, len(rows), UPSERT_BATCH):
+            supabase.table(SYMBOL_TABLE).upsert(rows[i:i + UPSERT_BATCH], on_conflict='ticker').execute()
+
+    print(f'Wrote symbol directory in {time.perf_counter() - started:.1f}s')
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load the Nasdaq Trader symbol directory into symbol_directory.')
+    parser.add_argument('--dry-run', action='store_true', help='download and parse the listings without writing them')
+    args = parser.parse_args(argv)
+    run(args.dry_run)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
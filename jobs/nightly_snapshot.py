@@ -0,0 +1,146 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from supabase import Client, create_client
+
+from analytics.panel import PricePanel
+from analytics.risk import historical_var_from_returns, position_weights, return_histogram
+from analytics.valuation import holdings_signature, portfolio_summary, value_holdings
+from services import market_data
+
+supabase_url = st.secrets["SUPABASE_URL"]
+supabase_key = st.secrets["SUPABASE_KEY"]
+supabase: Client = create_client(supabase_url, supabase_key)
+
+PAGE_SIZE = 1000
+UPSERT_BATCH = 500
+SNAPSHOT_TABLE = 'portfolio_snapshots'
+
+_panel = None
+
+
+def fetch_all(table, columns, order):
+    rows, start = [], 0
+    while True:
+        query = supabase.table(table).select(columns)
+        for column in order:
+            query = query.order(column)
+        batch = query.range(start, start + PAGE_SIZE - 1).execute().data or []
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def load_price_matrix(tickers, years):
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=years * 365)
+    close = market_data.download(tickers, start=start_date, end=end_date, auto_adjust=True, progress=False)['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+    return close.reindex(columns=tickers)
+
+
+def init_worker(panel_dir):
+    global _panel
+    _panel = PricePanel.load(panel_dir, mmap=True)
+
+
+def user_snapshot(user_id, holdings, days, confidence):
+    tickers = [t for t, _ in holdings]
+    panel = _panel.select(tickers)
+    missing = [t for t, ok in zip(tickers, np.isfinite(panel.values).any(axis=0)) if not ok]
+    if missing:
+        return {'user_id': user_id, 'error': f"no price history for {', '.join(missing)}"}
+
+    last_prices = pd.Series(panel.last_valid(), index=tickers, dtype=float)
+    previous_close = pd.Series(PricePanel(panel.values[:-1], panel.dates[:-1], tickers).last_valid(), index=tickers, dtype=float)
+    holdings_df = pd.DataFrame(holdings, columns=['ticker_symbol', 'share_count'])
+    valued = value_holdings(holdings_df, last_prices, previous_close)
+    summary = portfolio_summary(valued, 0)
+
+    shares = {t: float(s) for t, s in holdings}
+    weights = position_weights(shares, last_prices, summary['stock_value'])
+    returns = panel.log_returns()
+    if len(returns) >= days:
+        VaR, range_returns_dollar = historical_var_from_returns(returns, weights, summary['stock_value'], days, confidence)
+        var_value, var_histogram = float(VaR), return_histogram(range_returns_dollar)
+    else:
+        var_value, var_histogram = None, None
+
+    return {
+        'user_id': user_id,
+        'computed_at': datetime.now(timezone.utc).isoformat(),
+        'holdings_signature': holdings_signature(holdings_df),
+        'holdings': [
+            {'ticker': t, 'shares': float(s), 'price': float(last_prices[t]), 'previous_close': float(previous_close[t])}
+            for t, s in holdings
+        ],
+        'stock_value': summary['stock_value'],
+        'day_change': summary['day_change'],
+        'var_days': days,
+        'var_confidence': confidence,
+        'var_value': var_value,
+        'var_histogram': var_histogram,
+    }
+
+
+def run(workers, days, confidence, years, dry_run=False):
+    started = time.perf_counter()
+    rows = fetch_all('user_portfolio', 'user_id, ticker_symbol, share_count', ('user_id', 'ticker_symbol'))
+    by_user = defaultdict(list)
+    for row in rows:
+        by_user[row['user_id']].append((row['ticker_symbol'], row['share_count']))
+    tickers = sorted({row['ticker_symbol'] for row in rows})
+    print(f'{len(by_user)} users, {len(rows)} positions, {len(tickers)} unique tickers')
+    if not tickers:
+        return []
+
+    prices = load_price_matrix(tickers, years)
+    print(f'Loaded {prices.shape[0]} x {prices.shape[1]} price matrix in {time.perf_counter() - started:.1f}s')
+
+    user_ids = list(by_user)
+    chunksize = max(1, len(user_ids) // ((workers or os.cpu_count() or 1) * 4))
+    with tempfile.TemporaryDirectory(prefix='price_panel_') as panel_dir:
+        PricePanel.from_frame(prices, dtype=np.float64).save(panel_dir)
+        del prices
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(panel_dir,)) as pool:
+            results = list(pool.map(user_snapshot, user_ids, [by_user[u] for u in user_ids],
+                                    [days] * len(user_ids), [confidence] * len(user_ids), chunksize=chunksize))
+
+    snapshots = [r for r in results if 'error' not in r]
+    for r in results:
+        if 'error' in r:
+            print(f"Skipped {r['user_id']}: {r['error']}")
+
+    if not dry_run:
+        for i in range(0, len(snapshots), UPSERT_BATCH):
+            supabase.table(SNAPSHOT_TABLE).upsert(snapshots[i:i + UPSERT_BATCH], on_conflict='user_id').execute()
+
+    print(f'Wrote {len(snapshots)} snapshots in {time.perf_counter() - started:.1f}s')
+    return snapshots
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precompute portfolio value, day change and historical VaR for every user.')
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (default: CPU count)')
+    parser.add_argument('--days', type=int, default=5, help='VaR horizon in trading days')
+    parser.add_argument('--confidence', type=float, default=95.0, help='VaR confidence level in percent')
+    parser.add_argument('--years', type=int, default=10, help='years of price history for VaR')
+    parser.add_argument('--dry-run', action='store_true', help='compute snapshots without writing them')
+    args = parser.parse_args(argv)
+    run(args.workers, args.days, args.confidence, args.years, args.dry_run)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
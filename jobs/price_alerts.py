@@ -0,0 +1,104 @@
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from supabase import Client, create_client
+
+from analytics.alerts import AlertIndex
+from services import market_data
+from services.market_hours import exchange_now, is_market_open, next_open
+
+supabase_url = st.secrets["SUPABASE_URL"]
+supabase_key = st.secrets["SUPABASE_KEY"]
+supabase: Client = create_client(supabase_url, supabase_key)
+
+PAGE_SIZE = 1000
+WRITE_BATCH = 500
+ALERT_COLUMNS = ['id', 'user_id', 'ticker_symbol', 'kind', 'threshold']
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_active_alerts():
+    rows, start = [], 0
+    while True:
+        batch = (supabase.table('watchlist_alerts').select(', '.join(ALERT_COLUMNS)).eq('active', True)
+                 .order('id').range(start, start + PAGE_SIZE - 1).execute().data or [])
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return pd.DataFrame(rows, columns=ALERT_COLUMNS)
+        start += PAGE_SIZE
+
+
+def quote_snapshot(tickers):
+    close = market_data.download(tickers, period='5d', interval='1h', auto_adjust=True, progress=False)['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+    close = close.reindex(columns=tickers).ffill()
+    previous = close[close.index.date < close.index[-1].date()]
+    return close.iloc[-1], previous.iloc[-1] if len(previous) else pd.Series(float('nan'), index=tickers)
+
+
+def run_cycle(dry_run=False):
+    started = time.perf_counter()
+    alerts = fetch_active_alerts()
+    if alerts.empty:
+        print('No active alerts')
+        return pd.DataFrame()
+
+    index = AlertIndex.build(alerts)
+    prices, previous_close = quote_snapshot(index.tickers)
+    evaluated = time.perf_counter()
+    fired = index.evaluate(prices, previous_close)
+    print(f'{len(index)} alerts on {len(index.tickers)} tickers evaluated in '
+          f'{(time.perf_counter() - evaluated) * 1000:.1f}ms, {len(fired)} triggered')
+
+    events = fired.merge(alerts.rename(columns={'id': 'alert_id'}), on='alert_id')
+    if not dry_run and not events.empty:
+        rows = [{'alert_id': int(a), 'observed': float(o)} for a, o in zip(events['alert_id'], events['observed'])]
+        written = 0
+        for i in range(0, len(rows), WRITE_BATCH):
+            written += supabase.rpc('fire_alerts', {'p_events': rows[i:i + WRITE_BATCH]}).execute().data or 0
+        if written < len(rows):
+            print(f'{len(rows) - written} alerts were already deactivated and were skipped')
+
+    print(f'Cycle finished in {time.perf_counter() - started:.1f}s')
+    return events
+
+
+def run(interval, once=False, dry_run=False):
+    while True:
+        if once or is_market_open():
+            try:
+                run_cycle(dry_run)
+            except Exception:
+                if once:
+                    raise
+                logger.exception('Price alert cycle failed')
+            if once:
+                return
+            time.sleep(interval)
+        else:
+            wake = next_open()
+            print(f'Market closed; sleeping until {wake:%Y-%m-%d %H:%M %Z}')
+            time.sleep(max(interval, (wake - exchange_now()).total_seconds()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate every active watchlist price alert against one batched quote snapshot.')
+    parser.add_argument('--interval', type=int, default=60, help='seconds between cycles while the market is open')
+    parser.add_argument('--once', action='store_true', help='run a single cycle regardless of market hours and exit')
+    parser.add_argument('--dry-run', action='store_true', help='evaluate alerts without writing triggers')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    print(f'Price alert worker started at {datetime.now():%Y-%m-%d %H:%M:%S}')
+    run(args.interval, args.once, args.dry_run)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
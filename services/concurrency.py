@@ -0,0 +1,10 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+FETCH_WORKERS = 32
+
+fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='fetch')
+
+
+def submit(fn, *args, **kwargs):
+    return fetch_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
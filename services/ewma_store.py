@@ -0,0 +1,36 @@
+import threading
+from collections import OrderedDict
+
+from analytics.ewma import EwmaCovariance
+from services import market_data
+from services.market_hours import last_close
+from services.tracing import span
+
+SEED_PERIOD = '1y'
+MAX_UNIVERSES = 1000
+LOCK_STRIPES = 64
+
+_states = OrderedDict()
+_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+_lock = threading.Lock()
+
+
+def ewma_covariance(tickers):
+    key = tuple(sorted(tickers))
+    with _locks[hash(key) % LOCK_STRIPES]:
+        with _lock:
+            state = _states.get(key)
+        if state is None:
+            with span('compute.ewma_seed', tickers=list(key)):
+                state = EwmaCovariance.from_prices(market_data.daily_closes(list(key), period=SEED_PERIOD))
+        elif state.last_date.date() < last_close().date():
+            with span('compute.ewma_update', tickers=list(key)):
+                state = state.copy()
+                state.update_prices(market_data.daily_closes(list(key), start=state.last_date.date()))
+
+        with _lock:
+            _states[key] = state
+            _states.move_to_end(key)
+            while len(_states) > MAX_UNIVERSES:
+                _states.popitem(last=False)
+    return state
@@ -0,0 +1,42 @@
+import threading
+from collections import OrderedDict
+
+from analytics.factor_model import FactorModel
+from analytics.panel import PricePanel
+from services import market_data
+from services.market_hours import last_close
+from services.tracing import span
+
+LOOKBACK_PERIOD = '3y'
+MAX_UNIVERSES = 1000
+LOCK_STRIPES = 64
+
+_models = OrderedDict()
+_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+_lock = threading.Lock()
+
+
+def fit_factor_model(tickers, k=None, **kwargs):
+    closes = market_data.daily_closes(tickers, **kwargs)
+    panel = PricePanel.from_frame(closes, dtype='float64')
+    with span('compute.factor_model', tickers=tickers):
+        return FactorModel.fit(panel.log_returns(), tickers, k, last_date=closes.index[-1],
+                               last_prices=closes.ffill().iloc[-1].to_numpy(dtype=float))
+
+
+def factor_model(tickers, start=None, k=None):
+    key = (tuple(sorted(tickers)), str(start) if start else LOOKBACK_PERIOD, k)
+    with _locks[hash(key) % LOCK_STRIPES]:
+        with _lock:
+            fitted_for, model = _models.get(key, (None, None))
+        close = last_close().date()
+        if fitted_for != close:
+            period = {'start': start} if start else {'period': LOOKBACK_PERIOD}
+            model = fit_factor_model(list(key[0]), k, **period)
+
+        with _lock:
+            _models[key] = (close, model)
+            _models.move_to_end(key)
+            while len(_models) > MAX_UNIVERSES:
+                _models.popitem(last=False)
+    return model.select(list(tickers))
@@ -0,0 +1,107 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from supabase import Client, create_client
+
+from analytics.holdings import HoldingsSnapshot
+from analytics.valuation import holdings_signature
+from services import market_data
+from services.concurrency import submit
+from services.market_cache import ttl_seconds
+from services.market_hours import next_open
+from services.snapshots import fresh_snapshot
+from services.tracing import execute, span
+
+supabase_url = st.secrets["SUPABASE_URL"]
+supabase_key = st.secrets["SUPABASE_KEY"]
+supabase: Client = create_client(supabase_url, supabase_key)
+
+SESSION_KEY = 'holdings_snapshot'
+ROWS_KEY = 'holdings_rows'
+
+
+def retry_if_fail(ticker, start_date=None, end_date=None, max_retries=10, sleep_sec=0.5):
+    for attempt in range(max_retries):
+        try:
+            data = market_data.download(
+                ticker,
+                start=start_date,
+                end=end_date,
+                auto_adjust=True,
+                progress=False
+            )
+            if not data.empty and "Close" in data.columns:
+                return data["Close"]
+        except (KeyError, IndexError, ValueError, TypeError, AttributeError,
+                ConnectionError, TimeoutError, OSError, Exception):
+            pass
+        time.sleep(sleep_sec)
+    return pd.Series(dtype=float)
+
+
+def portfolio_rows(user_id):
+    cached = st.session_state.get(ROWS_KEY)
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+    rows = execute(supabase.table('user_portfolio').select('ticker_symbol', 'share_count')
+                   .eq('user_id', user_id).order('ticker_symbol')).data
+    df = pd.DataFrame(rows, columns=['ticker_symbol', 'share_count'])
+    st.session_state[ROWS_KEY] = (user_id, df)
+    return df
+
+
+def reset_portfolio_rows():
+    st.session_state.pop(ROWS_KEY, None)
+
+
+def load_holdings(user_id, df=None):
+    now = datetime.now(timezone.utc)
+    if df is None:
+        df = portfolio_rows(user_id)
+    signature = holdings_signature(df)
+    if df.empty:
+        return HoldingsSnapshot(user_id, [], [], [], [], expires_at=now + timedelta(seconds=ttl_seconds('quote', now)),
+                                signature=signature)
+
+    tickers = df['ticker_symbol'].tolist()
+    nightly = fresh_snapshot(user_id, df)
+    if nightly:
+        by_ticker = {h['ticker']: h for h in nightly['holdings']}
+        return HoldingsSnapshot(user_id, tickers, df['share_count'],
+                                [by_ticker[t]['price'] for t in tickers],
+                                [by_ticker[t]['previous_close'] for t in tickers],
+                                nightly=nightly, expires_at=next_open(now), signature=signature)
+
+    intraday_future = submit(market_data.download, tickers, period='5d', interval='1m', auto_adjust=True, progress=False)
+    info_futures = {t: submit(market_data.ticker_info, t) for t in tickers}
+    latest_prices = intraday_future.result()['Close'].ffill().bfill().iloc[-1].reindex(tickers)
+    retry_futures = {t: submit(retry_if_fail, t, start_date=datetime.now() - timedelta(days=1), end_date=datetime.now())
+                     for t in latest_prices[latest_prices.isna()].index}
+    for ticker, future in retry_futures.items():
+        retry_price = future.result()
+        latest_prices[ticker] = retry_price.iloc[-1] if not retry_price.empty else np.nan
+    info = {t: future.result() for t, future in info_futures.items()}
+    return HoldingsSnapshot(user_id, tickers, df['share_count'], latest_prices.to_numpy(),
+                            [info[t].get('previousClose', np.nan) for t in tickers], info=info,
+                            expires_at=now + timedelta(seconds=ttl_seconds('quote', now)), signature=signature)
+
+
+def holdings_snapshot(user_id):
+    df = portfolio_rows(user_id)
+    holdings = st.session_state.get(SESSION_KEY)
+    if (holdings is None or holdings.user_id != user_id or holdings.signature != holdings_signature(df)
+            or holdings.expires_at <= datetime.now(timezone.utc)):
+        with span('compute.holdings_snapshot'):
+            holdings = load_holdings(user_id, df)
+        st.session_state[SESSION_KEY] = holdings
+    return holdings
+
+
+def invalidate_holdings(user_id):
+    reset_portfolio_rows()
+    holdings = st.session_state.get(SESSION_KEY)
+    if holdings is not None and holdings.user_id == user_id:
+        del st.session_state[SESSION_KEY]
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import streamlit as st
+from supabase import Client, create_client
+
+from analytics.lots import LotBook
+from services.tracing import execute, span
+
+supabase_url = st.secrets["SUPABASE_URL"]
+supabase_key = st.secrets["SUPABASE_KEY"]
+supabase: Client = create_client(supabase_url, supabase_key)
+
+CHECKPOINT_TABLE = 'user_lot_checkpoints'
+TXN_COLUMNS = 'id, txn_date, txn_type, ticker_symbol, shares, price_per_share'
+PAGE_SIZE = 1000
+
+
+def fetch_transactions(user_id, after_id=None):
+    rows, start = [], 0
+    while True:
+        query = supabase.table('user_transactions').select(TXN_COLUMNS).eq('user_id', user_id)
+        if after_id is not None:
+            query = query.gt('id', after_id)
+        batch = execute(query.order('id').range(start, start + PAGE_SIZE - 1)).data or []
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    for row in rows:
+        row['txn_date'] = pd.to_datetime(row['txn_date'], utc=True).tz_localize(None).isoformat()
+    return rows
+
+
+def lot_book(user_id, method='FIFO'):
+    response = execute(supabase.table(CHECKPOINT_TABLE).select('book').eq('user_id', user_id).eq('method', method))
+    book = LotBook.from_dict(response.data[0]['book']) if response.data else None
+
+    if book is not None and book.last_txn_id is not None:
+        new = fetch_transactions(user_id, after_id=book.last_txn_id)
+        if not new:
+            return book
+        if book.can_append(new):
+            with span('compute.lots_incremental'):
+                book.apply_all(new)
+        else:
+            book = None
+
+    if book is None or book.last_txn_id is None:
+        txns = fetch_transactions(user_id)
+        with span('compute.lots_replay'):
+            book = LotBook(method).apply_all(txns)
+
+    execute(supabase.table(CHECKPOINT_TABLE).upsert({
+        'user_id': user_id,
+        'method': method,
+        'book': book.to_dict(),
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+    }, on_conflict='user_id,method'))
+    return book
+
+
+def invalidate_lot_books(user_id):
+    execute(supabase.table(CHECKPOINT_TABLE).delete().eq('user_id', user_id))
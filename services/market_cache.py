@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from services.market_hours import is_market_open, next_open
+from services.tracing import payload_size
+
+CACHE_MB_ENV = 'KEY_INVESTING_CACHE_MB'
+DEFAULT_CACHE_MB = 256
+
+OPEN_MARKET_TTL = {
+    'quote': 60,
+    'intraday': 60,
+    'daily': 15 * 60,
+}
+
+
+def ttl_seconds(kind, now=None):
+    now = now or datetime.now(timezone.utc)
+    if is_market_open(now):
+        return OPEN_MARKET_TTL[kind]
+    return max(OPEN_MARKET_TTL[kind], (next_open(now) - now).total_seconds())
+
+
+class CacheEntry:
+    __slots__ = ('value', 'size', 'expires_at')
+
+    def __init__(self, value, size, expires_at):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class MarketDataCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, min_ttl=0):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            if entry.expires_at - time.monotonic() <= min_ttl:
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def put(self, key, value, ttl):
+        size = payload_size(value) or 0
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value, size, time.monotonic() + ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_fetch(self, key, kind, fetch, min_ttl=0):
+        value = self.get(key, min_ttl)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value, True
+
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait()
+            value = self.get(key)
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                return value, True
+
+        with self._lock:
+            self.misses += 1
+        try:
+            value = fetch()
+            if is_cacheable(value):
+                self.put(key, value, ttl_seconds(kind))
+            return value, False
+        finally:
+            if leader:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    def discard_where(self, predicate):
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'megabytes': round(self.bytes / 2 ** 20, 2),
+                'limit_megabytes': round(self.max_bytes / 2 ** 20, 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+
+def is_cacheable(value):
+    if value is None:
+        return False
+    if hasattr(value, 'empty'):
+        return not value.empty
+    return bool(value)
+
+
+market_cache = MarketDataCache(int(float(os.environ.get(CACHE_MB_ENV, DEFAULT_CACHE_MB)) * 2 ** 20))
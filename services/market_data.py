@@ -0,0 +1,81 @@
+import copy
+from datetime import date, datetime, time, timedelta
+
+import pandas as pd
+import yfinance as yf
+
+from services.market_cache import market_cache
+from services.market_hours import last_close
+from services.tracing import span
+
+INTRADAY_SUFFIXES = ('m', 'h')
+
+
+def normalize_bound(value, end=False):
+    if isinstance(value, datetime):
+        day = value.date()
+        return day + timedelta(days=1) if end and value.time() != time(0) else day
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def normalize_kwargs(kwargs):
+    kwargs = dict(kwargs)
+    if 'start' in kwargs:
+        kwargs['start'] = normalize_bound(kwargs['start'])
+    if 'end' in kwargs:
+        kwargs['end'] = normalize_bound(kwargs['end'], end=True)
+    return kwargs
+
+
+def history_kind(kwargs):
+    return 'intraday' if str(kwargs.get('interval', '1d')).endswith(INTRADAY_SUFFIXES) else 'daily'
+
+
+def cache_key(name, tickers, kwargs):
+    return (name, tickers, tuple(sorted((k, str(v)) for k, v in kwargs.items() if k != 'progress')))
+
+
+def download(tickers, min_ttl=0, **kwargs):
+    kwargs = normalize_kwargs(kwargs)
+    if not isinstance(tickers, str):
+        tickers = sorted(tickers)
+    key_tickers = tickers if isinstance(tickers, str) else tuple(tickers)
+    with span('yfinance.download', tickers=tickers) as s:
+        data, hit = market_cache.get_or_fetch(
+            cache_key('download', key_tickers, kwargs), history_kind(kwargs),
+            lambda: yf.download(tickers=tickers, **kwargs), min_ttl)
+        s.cache = 'hit' if hit else 'miss'
+        return s.measure(data.copy())
+
+
+def ticker_info(ticker, min_ttl=0):
+    with span('yfinance.info', tickers=[ticker]) as s:
+        info, hit = market_cache.get_or_fetch(cache_key('info', (ticker,), {}), 'quote', lambda: yf.Ticker(ticker).info,
+                                              min_ttl)
+        s.cache = 'hit' if hit else 'miss'
+        return s.measure(copy.copy(info))
+
+
+def ticker_history(ticker, min_ttl=0, **kwargs):
+    kwargs = normalize_kwargs(kwargs)
+    with span('yfinance.history', tickers=[ticker]) as s:
+        hist, hit = market_cache.get_or_fetch(
+            cache_key('history', (ticker,), kwargs), history_kind(kwargs),
+            lambda: yf.Ticker(ticker).history(**kwargs), min_ttl)
+        s.cache = 'hit' if hit else 'miss'
+        return s.measure(hist.copy())
+
+
+def invalidate_tickers(tickers):
+    tickers = set(tickers)
+    market_cache.discard_where(lambda key: key[0] in ('info', 'history') and key[1][0] in tickers)
+
+
+def daily_closes(tickers, **kwargs):
+    close = download(tickers, auto_adjust=True, progress=False, **kwargs)['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+    close = close.reindex(columns=tickers)
+    return close[close.index.date <= last_close().date()]
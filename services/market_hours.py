@@ -0,0 +1,50 @@
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+
+
+def exchange_now(now=None):
+    if now is None:
+        return datetime.now(EXCHANGE_TZ)
+    if now.tzinfo is None:
+        now = now.astimezone()
+    return now.astimezone(EXCHANGE_TZ)
+
+
+def is_trading_day(day):
+    return day.weekday() < 5
+
+
+def is_market_open(now=None):
+    now = exchange_now(now)
+    return is_trading_day(now.date()) and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def last_close(now=None):
+    now = exchange_now(now)
+    day = now.date()
+    if not (is_trading_day(day) and now.time() >= MARKET_CLOSE):
+        day -= timedelta(days=1)
+        while not is_trading_day(day):
+            day -= timedelta(days=1)
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=EXCHANGE_TZ)
+
+
+def next_open(now=None):
+    now = exchange_now(now)
+    day = now.date()
+    if not (is_trading_day(day) and now.time() < MARKET_OPEN):
+        day += timedelta(days=1)
+        while not is_trading_day(day):
+            day += timedelta(days=1)
+    return datetime.combine(day, MARKET_OPEN, tzinfo=EXCHANGE_TZ)
+
+
+def next_close(now=None):
+    now = exchange_now(now)
+    if is_market_open(now):
+        return datetime.combine(now.date(), MARKET_CLOSE, tzinfo=EXCHANGE_TZ)
+    return datetime.combine(next_open(now).date(), MARKET_CLOSE, tzinfo=EXCHANGE_TZ)
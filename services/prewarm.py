@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import streamlit as st
+from supabase import Client, create_client
+
+from services import market_data
+from services.concurrency import submit
+from services.market_cache import OPEN_MARKET_TTL
+from services.market_hours import exchange_now, is_market_open, next_open
+from services.tracing import execute, span
+
+supabase_url = st.secrets["SUPABASE_URL"]
+supabase_key = st.secrets["SUPABASE_KEY"]
+supabase: Client = create_client(supabase_url, supabase_key)
+
+PAGE_SIZE = 1000
+BENCHMARK = '^GSPC'
+PORTFOLIO_DAYS = 90
+WATCHLIST_DAYS = 182
+REFRESH_SLACK = 15
+SESSION_INTERVAL = OPEN_MARKET_TTL['quote'] - REFRESH_SLACK
+
+logger = logging.getLogger(__name__)
+
+_thread = None
+_lock = threading.Lock()
+
+
+def fetch_all(table, columns, order):
+    rows, start = [], 0
+    while True:
+        query = supabase.table(table).select(columns)
+        for column in order:
+            query = query.order(column)
+        batch = execute(query.range(start, start + PAGE_SIZE - 1)).data or []
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def collect_universe():
+    portfolios = defaultdict(list)
+    for row in fetch_all('user_portfolio', 'user_id, ticker_symbol', ('user_id', 'ticker_symbol')):
+        portfolios[row['user_id']].append(row['ticker_symbol'])
+    watchlist = {row['ticker_symbol'] for row in fetch_all('user_watchlist', 'ticker_symbol', ('user_id', 'ticker_symbol'))}
+    saved = {t for row in fetch_all('saved_optimized_ports', 'tickers', ('user_id', 'port_name')) for t in row['tickers'] or ()}
+    tickers = set(watchlist) | saved | {t for held in portfolios.values() for t in held}
+    return portfolios, watchlist, sorted(tickers)
+
+
+def refresh_interval(now=None):
+    now = exchange_now(now)
+    if not is_market_open(now):
+        return max(SESSION_INTERVAL, (next_open(now) - now).total_seconds())
+    return SESSION_INTERVAL
+
+
+def prewarm(interval=0):
+    min_ttl = interval + REFRESH_SLACK
+    portfolios, watchlist, tickers = collect_universe()
+    portfolio_start = datetime.today() - timedelta(days=PORTFOLIO_DAYS)
+    today = datetime.now(timezone.utc)
+    watchlist_start = (today - timedelta(days=WATCHLIST_DAYS)).strftime("%Y-%m-%d")
+
+    with span('prewarm', tickers=tickers):
+        futures = [submit(market_data.download, BENCHMARK, min_ttl=min_ttl, start=portfolio_start,
+                          auto_adjust=True, progress=False)]
+        futures += [submit(market_data.download, held, min_ttl=min_ttl, start=portfolio_start,
+                           auto_adjust=True, progress=False) for held in portfolios.values()]
+        futures += [submit(market_data.download, held, min_ttl=min_ttl, period='5d', interval='1m',
+                           auto_adjust=True, progress=False) for held in portfolios.values()]
+        futures += [submit(market_data.ticker_history, t, min_ttl=min_ttl, start=watchlist_start,
+                           end=today.strftime("%Y-%m-%d")) for t in watchlist]
+        futures += [submit(market_data.ticker_info, t, min_ttl=min_ttl) for t in tickers]
+        failed = 0
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                failed += 1
+    return len(futures), failed
+
+
+def run_scheduler():
+    while True:
+        try:
+            prewarm(refresh_interval())
+        except Exception:
+            logger.exception('Cache prewarm failed')
+        time.sleep(refresh_interval())
+
+
+def start_prewarmer():
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=run_scheduler, name='cache-prewarm', daemon=True)
+            _thread.start()
+    return _thread
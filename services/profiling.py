@@ -0,0 +1,85 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+import streamlit as st
+
+PROFILE_ENV = 'KEY_INVESTING_PROFILE'
+PROFILE_DIR_ENV = 'KEY_INVESTING_PROFILE_DIR'
+DEFAULT_PROFILE_DIR = 'profiles'
+DEFAULT_INTERVAL = 0.005
+
+
+class SamplingProfiler:
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common()) + '\n'
+
+
+def profiling_enabled():
+    if os.environ.get(PROFILE_ENV, '').lower() in ('1', 'true', 'yes'):
+        return True
+    return st.query_params.get('profile') in ('1', 'true')
+
+
+def profile_path(page):
+    directory = Path(os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR))
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r'[^a-z0-9]+', '-', page.lower()).strip('-')
+    return directory / f"{slug}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.collapsed"
+
+
+@contextmanager
+def profile(page, interval=DEFAULT_INTERVAL):
+    profiler = SamplingProfiler(interval)
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        path = profile_path(page)
+        path.write_text(profiler.collapsed())
+        elapsed = time.perf_counter() - started
+        st.sidebar.caption(f'🔥 Profile: {profiler.samples} samples over {elapsed:.2f}s saved to {path}')
+
+
+def maybe_profile(page):
+    return profile(page) if profiling_enabled() else nullcontext()
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import streamlit as st
+from supabase import Client, create_client
+
+from analytics.valuation import holdings_signature
+from services.market_hours import exchange_now, is_market_open, last_close
+from services.tracing import execute
+
+supabase_url = st.secrets["SUPABASE_URL"]
+supabase_key = st.secrets["SUPABASE_KEY"]
+supabase: Client = create_client(supabase_url, supabase_key)
+
+SNAPSHOT_TABLE = 'portfolio_snapshots'
+
+
+def is_fresh(snapshot, holdings, now=None):
+    if not snapshot or snapshot['holdings_signature'] != holdings_signature(holdings):
+        return False
+    now = exchange_now(now)
+    if is_market_open(now):
+        return False
+    return datetime.fromisoformat(snapshot['computed_at']) >= last_close(now)
+
+
+def fresh_snapshot(user_id, holdings):
+    response = execute(supabase.table(SNAPSHOT_TABLE).select('*').eq('user_id', user_id))
+    snapshot = response.data[0] if response.data else None
+    return snapshot if is_fresh(snapshot, holdings) else None
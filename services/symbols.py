@@ -0,0 +1,98 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import streamlit as st
+from supabase import Client, create_client
+
+from analytics.symbols import SYMBOL_COLUMNS, SymbolIndex
+from services import market_data
+from services.tracing import execute, span
+
+supabase_url = st.secrets["SUPABASE_URL"]
+supabase_key = st.secrets["SUPABASE_KEY"]
+supabase: Client = create_client(supabase_url, supabase_key)
+
+SYMBOL_TABLE = 'symbol_directory'
+PAGE_SIZE = 1000
+RELOAD_SECONDS = 24 * 60 * 60
+INVALID_RECHECK = timedelta(days=1)
+
+_index = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def load_symbols():
+    rows, start = [], 0
+    columns = ', '.join(SYMBOL_COLUMNS + ['updated_at'])
+    while True:
+        batch = execute(supabase.table(SYMBOL_TABLE).select(columns).order('ticker')
+                        .range(start, start + PAGE_SIZE - 1)).data or []
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def symbol_index():
+    global _index, _loaded_at
+    with _lock:
+        if _index is None or time.monotonic() - _loaded_at > RELOAD_SECONDS:
+            with span('compute.symbol_index'):
+                _index = SymbolIndex.from_rows(load_symbols())
+            _loaded_at = time.monotonic()
+        return _index
+
+
+def is_settled(row):
+    if row is None:
+        return False
+    if row.get('valid'):
+        return True
+    checked = row.get('updated_at')
+    return bool(checked) and datetime.now(timezone.utc) - datetime.fromisoformat(checked) < INVALID_RECHECK
+
+
+def lookup_symbol(ticker):
+    info = market_data.ticker_info(ticker)
+    return {
+        'ticker': ticker,
+        'name': info.get('shortName') or info.get('longName'),
+        'exchange': info.get('exchange'),
+        'sector': info.get('sector'),
+        'valid': bool(info.get('regularMarketPrice')),
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def validate_ticker(ticker):
+    ticker = ticker.strip().upper()
+    index = symbol_index()
+    row = index.get(ticker)
+    if is_settled(row):
+        return bool(row['valid'])
+
+    row = lookup_symbol(ticker)
+    execute(supabase.table(SYMBOL_TABLE).upsert(row, on_conflict='ticker'))
+    with _lock:
+        index.add(row)
+    return row['valid']
+
+
+def suggest_symbols(prefix, limit=5):
+    index = symbol_index()
+    with _lock:
+        return index.complete(prefix, limit)
+
+
+def invalid_ticker_message(ticker, limit=5):
+    matches = []
+    for end in range(len(ticker), 0, -1):
+        matches = suggest_symbols(ticker[:end], limit)
+        if matches:
+            break
+    if not matches:
+        return f'Invalid ticker symbol {ticker}.'
+    suggestions = ', '.join(f"{m['ticker']} ({m['name']})" if m.get('name') else m['ticker'] for m in matches)
+    return f'Invalid ticker symbol {ticker}. Did you mean: {suggestions}?'
@@ -0,0 +1,211 @@
+import argparse
+import contextvars
+import functools
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+TRACE_FILE_ENV = 'KEY_INVESTING_TRACE_FILE'
+QUERY_METHODS = {'GET': 'select', 'POST': 'insert', 'PATCH': 'update', 'DELETE': 'delete'}
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+class Span:
+    __slots__ = ('name', 'tickers', 'bytes', 'cache', 'start', 'duration_ms', 'error')
+
+    def __init__(self, name, tickers=None, cache=None):
+        self.name = name
+        self.tickers = ticker_count(tickers)
+        self.bytes = None
+        self.cache = cache
+        self.start = 0.0
+        self.duration_ms = 0.0
+        self.error = None
+
+    def measure(self, result):
+        self.bytes = payload_size(result)
+        return result
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class Trace:
+    def __init__(self, page):
+        self.page = page
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc)
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.duration_ms = 0.0
+
+    def add(self, span):
+        self.spans.append(span)
+
+    def to_frame(self):
+        if not self.spans:
+            return pd.DataFrame(columns=['Step', 'Tickers', 'Bytes', 'Cache', 'Start (ms)', 'Duration (ms)'])
+        return pd.DataFrame([{
+            'Step': s.name,
+            'Tickers': s.tickers,
+            'Bytes': s.bytes,
+            'Cache': s.cache,
+            'Start (ms)': round(s.start, 1),
+            'Duration (ms)': round(s.duration_ms, 1),
+        } for s in self.spans]).astype({'Tickers': 'Int64', 'Bytes': 'Int64'})
+
+    def by_source(self):
+        totals = defaultdict(float)
+        for s in self.spans:
+            totals[s.name.split('.')[0]] += round(s.duration_ms, 1)
+        return pd.DataFrame(sorted(totals.items(), key=lambda kv: -kv[1]), columns=['Source', 'Duration (ms)'])
+
+    def records(self):
+        base = {'run_id': self.run_id, 'page': self.page, 'ts': self.started_at.isoformat()}
+        rows = [dict(base, name='page', tickers=None, bytes=None, cache=None, start=0.0,
+                     duration_ms=self.duration_ms, error=None)]
+        rows.extend(dict(base, **s.to_dict()) for s in self.spans)
+        return rows
+
+
+def ticker_count(tickers):
+    if tickers is None:
+        return None
+    if isinstance(tickers, str):
+        return len(tickers.split())
+    return len(tickers)
+
+
+def payload_size(obj):
+    if obj is None:
+        return None
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage().sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage())
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray, str)):
+        return len(obj)
+    content = getattr(obj, 'content', None)
+    if isinstance(content, (bytes, bytearray)):
+        return len(content)
+    data = getattr(obj, 'data', obj)
+    if isinstance(data, (list, dict)):
+        return len(json.dumps(data, default=str))
+    return None
+
+
+@contextmanager
+def span(name, tickers=None, cache=None):
+    s = Span(name, tickers, cache)
+    trace = _current_trace.get()
+    t0 = time.perf_counter()
+    try:
+        yield s
+    except Exception as e:
+        s.error = type(e).__name__
+        raise
+    finally:
+        s.duration_ms = (time.perf_counter() - t0) * 1000
+        if trace is not None:
+            s.start = (t0 - trace.origin) * 1000
+            trace.add(s)
+
+
+def execute(query, cache_lookup=False):
+    path = getattr(query, 'path', '').strip('/')
+    if path.startswith('rpc/'):
+        name = f"supabase.rpc.{path[4:]}"
+    else:
+        method = getattr(query, 'http_method', '')
+        name = f"supabase.{path or 'query'}.{QUERY_METHODS.get(method, method.lower() or 'execute')}"
+    with span(name) as s:
+        response = s.measure(query.execute())
+        if cache_lookup:
+            s.cache = 'hit' if response.data else 'miss'
+        return response
+
+
+def traced(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace(page):
+    t = Trace(page)
+    token = _current_trace.set(t)
+    try:
+        yield t
+    finally:
+        _current_trace.reset(token)
+        t.duration_ms = (time.perf_counter() - t.origin) * 1000
+        path = os.environ.get(TRACE_FILE_ENV)
+        if path:
+            append_jsonl(t, path)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def append_jsonl(t, path):
+    with open(path, 'a', encoding='utf-8') as f:
+        for row in t.records():
+            f.write(json.dumps(row, default=str) + '\n')
+
+
+def render_trace_panel(t, cache_stats=None):
+    with st.sidebar.expander('⏱️ Performance Trace', expanded=False):
+        if t is None:
+            st.caption('No trace recorded yet.')
+            return
+        st.caption(f'{t.page} · {t.duration_ms:,.0f} ms total · {len(t.spans)} spans')
+        st.dataframe(t.by_source(), hide_index=True)
+        st.dataframe(t.to_frame(), hide_index=True)
+        if cache_stats:
+            st.caption('Shared market-data cache')
+            st.dataframe(pd.DataFrame([cache_stats]), hide_index=True)
+
+
+def summarize(path):
+    df = pd.read_json(path, lines=True)
+    if df.empty:
+        return df
+    return (df.groupby(['page', 'name'])['duration_ms']
+              .agg(count='count',
+                   p50=lambda x: x.quantile(0.50),
+                   p95=lambda x: x.quantile(0.95),
+                   max='max')
+              .round(1)
+              .reset_index()
+              .sort_values(['page', 'p95'], ascending=[True, False]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Aggregate p50/p95 latency per page and step from a trace JSONL file.')
+    parser.add_argument('path')
+    args = parser.parse_args(argv)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(summarize(args.path).to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
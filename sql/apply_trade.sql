@@ -0,0 +1,59 @@
+-- Atomic buy/sell: applies the position change and the ledger entry in one transaction.
+-- Called from port_manager_tab via supabase.rpc('apply_trade', ...); returns the new share count.
+-- Relies on the (user_id, ticker_symbol) unique index from user_portfolio_unique.sql.
+create or replace function apply_trade(
+    p_user_id uuid,
+    p_ticker text,
+    p_txn_type text,
+    p_shares numeric,
+    p_price numeric,
+    p_notes text default 'N/A',
+    p_txn_date timestamptz default now()
+) returns numeric
+language plpgsql
+as $$
+declare
+    v_held numeric;
+    v_new numeric;
+begin
+    if p_shares is null or p_shares <= 0 then
+        raise exception 'Share count must be positive.' using errcode = '22023';
+    end if;
+
+    if p_txn_type = 'Buy' then
+        insert into user_portfolio (user_id, ticker_symbol, share_count)
+        values (p_user_id, p_ticker, p_shares)
+        on conflict (user_id, ticker_symbol)
+            do update set share_count = user_portfolio.share_count::numeric + excluded.share_count::numeric
+        returning share_count::numeric into v_new;
+    elsif p_txn_type = 'Sell' then
+        select share_count::numeric into v_held
+        from user_portfolio
+        where user_id = p_user_id and ticker_symbol = p_ticker
+        for update;
+
+        if v_held is null then
+            raise exception 'You do not own any shares of %.', p_ticker using errcode = 'P0002';
+        end if;
+        v_new := v_held - p_shares;
+        if v_new < 0 then
+            raise exception 'You are trying to remove more shares of % than you currently own.', p_ticker
+                using errcode = '22003';
+        end if;
+
+        if v_new = 0 then
+            delete from user_portfolio where user_id = p_user_id and ticker_symbol = p_ticker;
+        else
+            update user_portfolio set share_count = v_new
+            where user_id = p_user_id and ticker_symbol = p_ticker;
+        end if;
+    else
+        raise exception 'Unknown transaction type %.', p_txn_type using errcode = '22023';
+    end if;
+
+    insert into user_transactions (user_id, txn_date, txn_type, ticker_symbol, shares, price_per_share, total_value, notes)
+    values (p_user_id, p_txn_date, p_txn_type, p_ticker, p_shares, p_price, p_shares * p_price, coalesce(p_notes, 'N/A'));
+
+    return v_new;
+end;
+$$;
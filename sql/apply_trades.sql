@@ -0,0 +1,32 @@
+-- Atomic bulk import: applies every parsed CSV trade through apply_trade in one transaction.
+-- Called from import_trades via supabase.rpc('apply_trades', ...) with the rows built by transaction_rows;
+-- any failing trade (e.g. an oversell) raises and rolls back the whole import. Returns the number of trades applied.
+-- Requires apply_trade.sql.
+create or replace function apply_trades(
+    p_user_id uuid,
+    p_trades jsonb
+) returns integer
+language plpgsql
+as $$
+declare
+    v_trade jsonb;
+    v_count integer := 0;
+begin
+    for v_trade in
+        select value from jsonb_array_elements(p_trades) with ordinality order by ordinality
+    loop
+        perform apply_trade(
+            p_user_id,
+            v_trade->>'ticker_symbol',
+            v_trade->>'txn_type',
+            (v_trade->>'shares')::numeric,
+            (v_trade->>'price_per_share')::numeric,
+            coalesce(v_trade->>'notes', 'N/A'),
+            (v_trade->>'txn_date')::timestamptz
+        );
+        v_count := v_count + 1;
+    end loop;
+
+    return v_count;
+end;
+$$;
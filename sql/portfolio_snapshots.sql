@@ -0,0 +1,13 @@
+-- Nightly per-user valuation and risk snapshot written by jobs/nightly_snapshot.py
+create table if not exists portfolio_snapshots (
+    user_id uuid primary key,
+    computed_at timestamptz not null default now(),
+    holdings_signature text not null,
+    holdings jsonb not null,
+    stock_value double precision not null,
+    day_change double precision not null,
+    var_days integer not null,
+    var_confidence double precision not null,
+    var_value double precision,
+    var_histogram jsonb
+);
@@ -0,0 +1,10 @@
+-- Symbol directory loaded into services/symbols.py for local ticker validation and autocomplete.
+-- Seeded by jobs/load_symbols.py; symbols missing from it are looked up once and recorded here.
+create table if not exists symbol_directory (
+    ticker text primary key,
+    name text,
+    exchange text,
+    sector text,
+    valid boolean not null default true,
+    updated_at timestamptz not null default now()
+);
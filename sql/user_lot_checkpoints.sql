@@ -0,0 +1,9 @@
+-- Tax-lot checkpoint per user and cost basis method, maintained by services/lots.py.
+-- book holds open lots, realized gain per ticker and the last ledger row applied.
+create table if not exists user_lot_checkpoints (
+    user_id uuid not null,
+    method text not null,
+    book jsonb not null,
+    updated_at timestamptz not null default now(),
+    primary key (user_id, method)
+);
@@ -0,0 +1,3 @@
+-- One row per (user, ticker) so bulk trade imports can recompute positions with a single upsert
+create unique index if not exists user_portfolio_user_ticker_key
+    on user_portfolio (user_id, ticker_symbol);
@@ -0,0 +1,54 @@
+-- Price alerts on watchlist entries, evaluated by jobs/price_alerts.py.
+-- kind is 'Price Above', 'Price Below' or 'Day Move (%)'; alerts fire once and are then deactivated.
+create table if not exists watchlist_alerts (
+    id bigserial primary key,
+    user_id uuid not null,
+    ticker_symbol text not null,
+    kind text not null check (kind in ('Price Above', 'Price Below', 'Day Move (%)')),
+    threshold double precision not null,
+    active boolean not null default true,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists watchlist_alerts_active on watchlist_alerts (ticker_symbol) where active;
+
+create table if not exists triggered_alerts (
+    id bigserial primary key,
+    alert_id bigint not null references watchlist_alerts (id) on delete cascade,
+    user_id uuid not null,
+    ticker_symbol text not null,
+    kind text not null,
+    threshold double precision not null,
+    observed double precision not null,
+    triggered_at timestamptz not null default now(),
+    dismissed boolean not null default false
+);
+
+create index if not exists triggered_alerts_user on triggered_alerts (user_id) where not dismissed;
+
+-- Atomically deactivates the given alerts and records a trigger for each one that was still active.
+-- Called from jobs/price_alerts.py with [{alert_id, observed}, ...]; returns the number of alerts fired.
+-- Alerts already deactivated by an earlier (possibly interrupted) run are skipped, so retries never duplicate.
+create or replace function fire_alerts(p_events jsonb) returns integer
+language plpgsql
+as $$
+declare
+    v_count integer;
+begin
+    with events as (
+        select (e->>'alert_id')::bigint as alert_id, (e->>'observed')::double precision as observed
+        from jsonb_array_elements(p_events) e
+    ), flipped as (
+        update watchlist_alerts a
+        set active = false
+        from events
+        where a.id = events.alert_id and a.active
+        returning a.id, a.user_id, a.ticker_symbol, a.kind, a.threshold, events.observed
+    )
+    insert into triggered_alerts (alert_id, user_id, ticker_symbol, kind, threshold, observed)
+    select id, user_id, ticker_symbol, kind, threshold, observed from flipped;
+
+    get diagnostics v_count = row_count;
+    return v_count;
+end;
+$$;